@@ -0,0 +1,525 @@
+import io
+import os
+import csv
+import glob
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from config import get_input_dir, get_output_dir
+from main import (ConversionCancelled, annual_filename, prepare_attendance, process_attendance,
+                  output_filename)
+from manifest import find_up_to_date_output
+from profiling import collect, timed
+from summary_workbook import (aggregate, merge_records, summary_filename, summary_records,
+                              write_summary_workbook)
+from utils import (DURATION_COLUMNS, attendance_totals, extract_employee_name, is_small_csv,
+                   iter_csv_groups, process_data, split_by_month, write_annual_workbook,
+                   write_to_excel)
+
+# freeeからダウンロードした勤怠詳細CSVのファイル名（勤怠詳細_氏名_YYYY_MM.csv）
+CSV_PATTERN = "勤怠詳細_*_[0-9][0-9][0-9][0-9]_[0-9][0-9].csv"
+
+
+def find_csv_files(input_dir=None, pattern=CSV_PATTERN):
+    """入力フォルダ以下から処理対象のCSVファイルを探して、パス順に返す"""
+    if input_dir is None:
+        input_dir = get_input_dir()
+    search_path = os.path.join(input_dir, "**", pattern)
+    return sorted(glob.glob(search_path, recursive=True))
+
+
+def file_safe_name(name):
+    """出力ファイル名に使えるよう、氏名から空白を取り除く"""
+    return re.sub(r"\s", "", str(name))
+
+
+def employee_name_for(csv_path, default_name):
+    """出力ファイル名に使う従業員名を決める（CSVファイル名優先、空白は除去）"""
+    name = extract_employee_name(csv_path)
+    if not name:
+        return default_name
+    return file_safe_name(name)
+
+
+class QueueProgress:
+    """
+    処理段階を (ジョブID, 段階名) としてキューに送るprogressコールバック
+    multiprocessing.Managerのキュー・イベントを渡せばワーカープロセスにも受け渡せる
+    cancel_eventがセットされていれば次の段階に進まずに中止する
+    """
+
+    def __init__(self, job_id, events, cancel_event=None):
+        self.job_id = job_id
+        self.events = events
+        self.cancel_event = cancel_event
+
+    def __call__(self, stage):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ConversionCancelled()
+        self.events.put((self.job_id, stage))
+
+
+def error_message(e):
+    """結果の辞書のerrorに記録する例外の内容"""
+    return f"{type(e).__name__}: {e}"
+
+
+def failed_result(label, error):
+    """処理できなかった1件分の結果の辞書（ワーカープロセス自体が異常終了した場合など）"""
+    return {"csv_path": label, "output_path": None, "elapsed": 0.0, "error": error,
+            "skipped": False}
+
+
+def run_job(label, fn, *args, **kwargs):
+    """
+    1件分の処理fn(result, *args, **kwargs)を実行し、共通の形式の結果の辞書を返す
+    fnは結果の辞書に出力パスなどを書き込む（csv_pathには一覧に表示する名前としてlabelが入る）
+    例外は呼び出し元に投げずerrorに記録し、処理時間（elapsed）と段階ごとの時間（timings）も記録する
+    """
+    start = time.perf_counter()
+    result = failed_result(label, None)
+    with collect() as timings:
+        try:
+            fn(result, *args, **kwargs)
+        except ConversionCancelled:
+            result["error"] = "中止しました"
+        except Exception as e:
+            result["error"] = error_message(e)
+    result["elapsed"] = time.perf_counter() - start
+    result["timings"] = timings
+    return result
+
+
+def convert_one(csv_path, template_path, employee_name, output_dir, progress=None, force=False,
+                annual=False, summary=False):
+    """
+    CSVファイル1件を変換する（ワーカープロセスからも呼ばれる）
+    例外は呼び出し元に投げず、結果の辞書に記録して返す
+    前回の変換から入力が変わっていない場合は変換せず、skippedをTrueにする
+    annualの場合はCSVに含まれる月をまとめた1つのExcelファイルにする
+    summaryの場合は集計表に使うデータ（summary_records）を結果のsummaryに入れる
+    （変換しなかったCSVも読み込んで整形する）
+    """
+    def convert(result):
+        def keep_summary(data):
+            result["summary"] = summary_records(data, employee_name)
+
+        with timed("manifest"):
+            output_path = None if force else find_up_to_date_output(
+                csv_path, template_path, employee_name, output_dir, annual
+            )
+        if output_path:
+            result["output_path"] = output_path
+            result["skipped"] = True
+            if summary:
+                keep_summary(prepare_attendance(csv_path, is_small_csv(csv_path))[0])
+        else:
+            result["output_path"] = process_attendance(
+                csv_path, template_path, employee_name, output_dir=output_dir,
+                progress=progress, force=True, annual=annual,
+                on_data=keep_summary if summary else None
+            )
+
+    return run_job(csv_path, convert)
+
+
+def annual_label(csv_paths, employee_name):
+    """年間の勤怠表1件分の表示名"""
+    return f"{employee_name}（{len(csv_paths)}ファイル）"
+
+
+def convert_annual(csv_paths, template_path, employee_name, output_dir, summary=False):
+    """
+    1人分のCSVファイル（月ごとのファイルなど）を、月ごとの勤務表シートと年間集計シートを持つ
+    1つのExcelファイルに変換する（ワーカープロセスからも呼ばれる）
+    同じ月が複数のCSVにある場合は後のCSV（パス順）を使う
+    """
+    def convert(result):
+        months = {}
+        for csv_path in csv_paths:
+            data, _ = prepare_attendance(csv_path, is_small_csv(csv_path))
+            months.update(split_by_month(data))
+        months = sorted(months.items())
+        output_path = os.path.join(output_dir, annual_filename(months, employee_name))
+        write_annual_workbook(template_path, output_path, months, csv_paths[0])
+        result["output_path"] = output_path
+        if summary:
+            result["summary"] = merge_records(
+                summary_records(data, employee_name) for _, data in months
+            )
+
+    return run_job(annual_label(csv_paths, employee_name), convert)
+
+
+def bundle_one(csv_path, template_path, employee_name, summary=False):
+    """
+    CSVファイル1件をメモリ上で変換する（ワーカープロセスからも呼ばれる）
+    結果の辞書にxlsxの内容（xlsx）と合計時間（totals）を入れて返し、ファイルには保存しない
+    """
+    def convert(result):
+        data, year_month = prepare_attendance(csv_path, is_small_csv(csv_path))
+        output = io.BytesIO()
+        write_to_excel(template_path, output, data, csv_path)
+        result["output_path"] = output_filename(year_month, employee_name)
+        result["xlsx"] = output.getvalue()
+        result["totals"] = {"従業員名": employee_name, **attendance_totals(data)}
+        if summary:
+            result["summary"] = summary_records(data, employee_name)
+
+    return run_job(csv_path, convert)
+
+
+class BundleWriter:
+    """
+    変換したxlsxを届いた順に1つのZIPへ書き込む（出力フォルダには保存しない）
+    閉じるときに従業員・年月ごとの合計時間の一覧（勤怠表一覧.csv）を追加する
+    """
+    INDEX_NAME = "勤怠表一覧.csv"
+    FIELDS = ["従業員名", "年月", "出勤日数", *DURATION_COLUMNS, "ファイル名", "元データ"]
+
+    def __init__(self, path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path, "w")
+        self.rows = []
+
+    def add(self, result):
+        """変換結果のxlsxをZIPに追加する（結果の辞書からxlsxの内容は取り除く）"""
+        xlsx = result.pop("xlsx", None)
+        if result["error"] is not None or xlsx is None:
+            return
+        arcname = os.path.basename(result["output_path"])
+        if any(row["ファイル名"] == arcname for row in self.rows):
+            result["error"] = f"ZIP内のファイル名が重複しています: {arcname}"
+            return
+        info = zipfile.ZipInfo(arcname, time.localtime()[:6])
+        # xlsxはすでに圧縮されているため、圧縮せずに格納する
+        info.compress_type = zipfile.ZIP_STORED
+        self.zip.writestr(info, xlsx)
+        self.rows.append({**result.pop("totals"), "ファイル名": arcname,
+                          "元データ": os.path.basename(result["csv_path"])})
+
+    def close(self):
+        """一覧のCSVを追加してZIPを閉じる"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.FIELDS)
+        writer.writeheader()
+        writer.writerows(sorted(self.rows, key=lambda row: (row["年月"], row["ファイル名"])))
+        # Excelで文字化けしないようBOM付きのUTF-8にする
+        self.zip.writestr(self.INDEX_NAME, buffer.getvalue().encode("utf-8-sig"),
+                          compress_type=zipfile.ZIP_DEFLATED)
+        self.zip.close()
+        print(f"📦 ZIPにまとめました: {self.path}（{len(self.rows)}件）")
+
+    def add_file(self, arcname, data):
+        """勤怠表以外のファイル（集計表など）をZIPに追加する"""
+        self.zip.writestr(arcname, data, compress_type=zipfile.ZIP_DEFLATED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def save_summary(results, output_dir, writer=None):
+    """
+    変換結果のsummaryを集計し、出力フォルダ（writerがある場合はZIP）に集計表を保存する
+    結果の辞書からsummaryは取り除く
+    """
+    with timed("summary"):
+        table = aggregate(results)
+        for result in results:
+            result.pop("summary", None)
+        if table is None:
+            return
+        name = summary_filename(table)
+        if writer:
+            output = io.BytesIO()
+            write_summary_workbook(output, table)
+            writer.add_file(name, output.getvalue())
+            print(f"📊 集計表をZIPに追加しました: {name}（{len(table)}行）")
+        else:
+            write_summary_workbook(os.path.join(output_dir, name), table)
+
+
+def run_batch(csv_paths, template_path, default_name, jobs=1, force=False, bundle=None,
+              output_dir=None, annual=False, summary=False):
+    """
+    複数のCSVファイルをまとめて変換する
+    jobsが2以上の場合はプロセスプールで並列に処理する
+    前回から変更のないCSVは変換しない（forceを指定するとすべて変換する）
+    bundleにZIPファイルのパスを指定すると、出力フォルダには保存せずZIPにまとめる
+    output_dirを省略した場合はconfig.iniのoutput_dirに保存する
+    annualの場合は従業員ごとにCSVをまとめ、月ごとのシートを持つ1つのExcelファイルにする
+    （変換履歴は使わず、常に変換する）
+    summaryの場合は全従業員の月ごとの合計をまとめた集計表（勤怠集計_YYYYMM-YYYYMM.xlsx）も作成する
+    ファイルごとの結果（出力パス・処理時間・エラー）を入力順のリストで返す
+    """
+    if annual:
+        output_dir = output_dir or get_output_dir()
+        os.makedirs(output_dir, exist_ok=True)
+        groups = {}
+        for csv_path in csv_paths:
+            groups.setdefault(employee_name_for(csv_path, default_name), []).append(csv_path)
+        worker, kwargs = convert_annual, {"summary": summary}
+        tasks = [(paths, template_path, name, output_dir) for name, paths in groups.items()]
+        labels = [annual_label(paths, name) for name, paths in groups.items()]
+    elif bundle:
+        worker, kwargs = bundle_one, {"summary": summary}
+        tasks = [(csv_path, template_path, employee_name_for(csv_path, default_name))
+                 for csv_path in csv_paths]
+        labels = list(csv_paths)
+    else:
+        output_dir = output_dir or get_output_dir()
+        os.makedirs(output_dir, exist_ok=True)
+        worker, kwargs = convert_one, {"force": force, "summary": summary}
+        tasks = [
+            (csv_path, template_path, employee_name_for(csv_path, default_name), output_dir)
+            for csv_path in csv_paths
+        ]
+        labels = list(csv_paths)
+    jobs = max(1, min(jobs, len(tasks)))
+
+    results = [None] * len(tasks)
+    batch_start = time.perf_counter()
+    writer = BundleWriter(bundle) if bundle else None
+    try:
+        if jobs == 1:
+            for index, task in enumerate(tasks):
+                results[index] = worker(*task, **kwargs)
+                if writer:
+                    writer.add(results[index])
+                report_progress(results[index], index + 1, len(tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {executor.submit(worker, *task, **kwargs): index
+                           for index, task in enumerate(tasks)}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        # ワーカープロセス自体が異常終了した場合
+                        results[index] = failed_result(labels[index], error_message(e))
+                    if writer:
+                        writer.add(results[index])
+                    report_progress(results[index], done, len(tasks))
+        if summary:
+            save_summary(results, output_dir, writer)
+    finally:
+        if writer:
+            writer.close()
+
+    warn_duplicate_outputs(results)
+    print_summary(results, time.perf_counter() - batch_start, jobs)
+    return results
+
+
+def convert_group(df, template_path, output_path, csv_path, employee_name, label, bundle=False,
+                  summary=False):
+    """
+    まとめたCSVから切り出した従業員・月1件分を変換する（ワーカープロセスからも呼ばれる）
+    bundleの場合はファイルに保存せず、結果の辞書にxlsxの内容と合計時間を入れて返す
+    """
+    def convert(result):
+        with timed("process_data"):
+            data = process_data(df)
+        output = io.BytesIO() if bundle else output_path
+        write_to_excel(template_path, output, data, csv_path, employee_name=employee_name)
+        result["output_path"] = output_path
+        if bundle:
+            result["xlsx"] = output.getvalue()
+            result["totals"] = {"従業員名": file_safe_name(employee_name),
+                                **attendance_totals(data)}
+        if summary:
+            result["summary"] = summary_records(data, file_safe_name(employee_name))
+
+    return run_job(label, convert)
+
+
+def convert_annual_group(months, template_path, output_path, csv_path, employee_name, label,
+                         summary=False):
+    """
+    まとめたCSVから切り出した従業員1人分の複数月を、月ごとのシートを持つ1つのExcelファイルに変換する
+    （ワーカープロセスからも呼ばれる）monthsは [(年月, DataFrame), ...]
+    """
+    def convert(result):
+        with timed("process_data"):
+            processed = [(year_month, process_data(df)) for year_month, df in months]
+        write_annual_workbook(template_path, output_path, processed, csv_path,
+                              employee_name=employee_name)
+        result["output_path"] = output_path
+        if summary:
+            result["summary"] = merge_records(
+                summary_records(data, file_safe_name(employee_name)) for _, data in processed
+            )
+
+    return run_job(label, convert)
+
+
+def convert_consolidated(csv_path, template_path, chunksize=50000, jobs=1, bundle=None,
+                         annual=False, summary=False):
+    """
+    全従業員・複数月をまとめたCSVを従業員番号・年月ごとに分けて変換する
+    CSVは少しずつ読み込み、読み終わったグループから順に書き出すため、
+    ファイルサイズが大きくてもメモリ使用量は一定に保たれる
+    jobsが2以上の場合は書き出しをプロセスプールで並列に行う
+    bundleにZIPファイルのパスを指定すると、出力フォルダには保存せずZIPにまとめる
+    annualの場合は従業員ごとに、月ごとのシートを持つ1つのExcelファイルにする
+    （従業員1人分の月を読み終えた時点で書き出す）
+    summaryの場合は全従業員の月ごとの合計をまとめた集計表も作成する
+    """
+    output_dir = get_output_dir()
+    if not bundle:
+        os.makedirs(output_dir, exist_ok=True)
+
+    results = []
+    names = {}  # 出力ファイル名に使った氏名 → 従業員番号
+    batch_start = time.perf_counter()
+
+    def output_name_for(employee_id, name):
+        # 同姓同名の別の従業員は従業員番号を付けて区別する
+        safe_name = file_safe_name(name)
+        if names.setdefault(safe_name, employee_id) != employee_id:
+            safe_name = f"{safe_name}_{employee_id}"
+        return safe_name
+
+    def collect(result):
+        if writer:
+            writer.add(result)
+        results.append(result)
+        report_progress(result, len(results))
+
+    def collect_future(future):
+        label = in_flight.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            # ワーカープロセス自体が異常終了した場合
+            result = failed_result(label, error_message(e))
+        collect(result)
+
+    def submit(worker, task, label):
+        if executor is None:
+            collect(worker(*task))
+            return
+        try:
+            in_flight[executor.submit(worker, *task)] = label
+        except Exception as e:
+            # 異常終了したワーカーがありプールが使えない場合
+            collect(failed_result(label, error_message(e)))
+            return
+        # 読み込んだデータが溜まりすぎないよう、書き出し待ちを並列数の2倍までにする
+        if len(in_flight) >= jobs * 2:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                collect_future(future)
+
+    annual_months = []  # annualの場合、読み込み中の従業員の [(年月, DataFrame), ...]
+    annual_employee = None  # その従業員の (従業員番号, 氏名)
+    annual_done = set()
+
+    def flush_annual():
+        if not annual_months:
+            return
+        employee_id, name = annual_employee
+        annual_done.add(employee_id)
+        annual_months.sort(key=lambda month: month[0])
+        output_path = os.path.join(output_dir, annual_filename(annual_months,
+                                                               output_name_for(employee_id, name)))
+        label = f"{name}（{employee_id}） {annual_months[0][0]}-{annual_months[-1][0]}"
+        submit(convert_annual_group, (list(annual_months), template_path, output_path, csv_path,
+                                      name, label, summary), label)
+        annual_months.clear()
+
+    writer = BundleWriter(bundle) if bundle else None
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    in_flight = {}  # 書き出し中の {Future: 表示名}
+    try:
+        groups = iter_csv_groups(csv_path, chunksize=chunksize)
+        while True:
+            try:
+                # 読み込みは呼び出し元のプロセスで行う（collectの中で呼ばれた場合に計測される）
+                with timed("read_csv"):
+                    group = next(groups, None)
+            except Exception as e:
+                # CSV自体が読めない場合はそこで打ち切る
+                collect(failed_result(csv_path, error_message(e)))
+                break
+            if group is None:
+                break
+
+            employee_id, name, year_month, df = group
+            if annual:
+                if annual_employee is not None and annual_employee[0] != employee_id:
+                    flush_annual()
+                if employee_id in annual_done:
+                    collect(failed_result(
+                        csv_path, f"CSVが従業員の順に並んでいません（従業員番号{employee_id}が"
+                                  "離れた位置にあります）。従業員番号・日付の順に並べ替えてから実行してください"
+                    ))
+                    break
+                annual_employee = (employee_id, name)
+                annual_months.append((year_month, df))
+                continue
+
+            output_path = os.path.join(output_dir, output_filename(year_month,
+                                                                   output_name_for(employee_id, name)))
+            label = f"{name}（{employee_id}） {year_month}"
+            submit(convert_group, (df, template_path, output_path, csv_path, name, label,
+                                   bool(bundle), summary), label)
+
+        flush_annual()
+        for future in as_completed(list(in_flight)):
+            collect_future(future)
+        if summary:
+            save_summary(results, output_dir, writer)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if writer:
+            writer.close()
+
+    # 完了順ではなく出力ファイル名順に並べて返す
+    results.sort(key=lambda r: (r["output_path"] is None, r["output_path"] or ""))
+    print_summary(results, time.perf_counter() - batch_start, jobs)
+    return results
+
+
+def report_progress(result, done, total=None):
+    """1件分の処理結果を表示する（totalが不明な場合は件数のみ）"""
+    name = os.path.basename(result["csv_path"])
+    count = f"{done}/{total}" if total else f"{done}"
+    if result.get("skipped"):
+        print(f"⏭ [{count}] {name} (変更なし)")
+    elif result["error"] is None:
+        print(f"✅ [{count}] {name} ({result['elapsed']:.2f}秒)")
+    else:
+        print(f"❌ [{count}] {name}: {result['error']}")
+
+
+def warn_duplicate_outputs(results):
+    """複数のCSVが同じ出力ファイルになった場合に警告する"""
+    seen = {}
+    for result in results:
+        output_path = result["output_path"]
+        if output_path is None:
+            continue
+        if output_path in seen:
+            print(f"⚠ 出力ファイルが重複しています: {output_path}"
+                  f"（{os.path.basename(seen[output_path])} / {os.path.basename(result['csv_path'])}）")
+        else:
+            seen[output_path] = result["csv_path"]
+
+
+def print_summary(results, total_elapsed, jobs=1):
+    """一括処理の件数・合計時間・スループットを表示する"""
+    skipped = sum(1 for r in results if r.get("skipped"))
+    succeeded = sum(1 for r in results if r["error"] is None) - skipped
+    failed = len(results) - succeeded - skipped
+    throughput = len(results) / total_elapsed if total_elapsed > 0 else 0.0
+    print(
+        f"処理件数: {len(results)}件（成功 {succeeded} / 変更なし {skipped} / 失敗 {failed}）  並列数: {jobs}"
+        f"  合計: {total_elapsed:.2f}秒  スループット: {throughput:.1f}件/秒"
+    )
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+# リポジトリ直下のモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from config import get_date_format
+from utils import (CSV_COLUMNS, csv_read_encoding, read_csv_options, read_csv_pyarrow,
+                   parse_dates, process_data)
+from generate_freee_csv import generate
+
+
+def read_csv_untyped(csv_path):
+    """全列を型推論で読み込む（従来の処理）"""
+    df = pd.read_csv(csv_path, encoding=csv_read_encoding())
+    df["日付"] = pd.to_datetime(df["日付"], format=get_date_format())
+    return df
+
+
+def read_csv_c(csv_path):
+    """必要な列だけを型指定してcエンジンで読み込む"""
+    df = pd.read_csv(csv_path, engine="c", **read_csv_options(CSV_COLUMNS))
+    df["日付"] = parse_dates(df["日付"])
+    return df
+
+
+def read_csv_arrow(csv_path):
+    """必要な列だけを型指定してpyarrowで読み込む"""
+    df = read_csv_pyarrow(csv_path, CSV_COLUMNS)
+    df["日付"] = parse_dates(df["日付"])
+    return df
+
+
+def measure(reader, csv_path):
+    """読み込み＋整形の処理時間・メモリのピーク・DataFrameのサイズを返す"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = reader(csv_path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = df.memory_usage(deep=True).sum()
+    process_data(df)
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV読み込みの処理時間とメモリ使用量を比較する")
+    parser.add_argument("--employees", type=int, default=300, help="従業員数")
+    parser.add_argument("--months", type=int, default=12, help="月数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, "勤怠詳細_全従業員.csv")
+        rows = generate(csv_path, args.employees, args.months)
+        print(f"{rows}行 / {os.path.getsize(csv_path) / 1024 / 1024:.1f} MB")
+
+        readers = [
+            ("全列・型推論（従来）", read_csv_untyped),
+            ("必要な列・型指定", read_csv_c),
+        ]
+        try:
+            import pyarrow  # noqa: F401
+            readers.append(("必要な列・型指定（pyarrow）", read_csv_arrow))
+        except ImportError:
+            print("pyarrowがインストールされていないため、pyarrowの計測は省略します")
+        for label, reader in readers:
+            elapsed, peak, size = measure(reader, csv_path)
+            print(f"{label:<20} {elapsed:7.3f} 秒  {rows / elapsed:10.0f} 行/秒  "
+                  f"ピーク {peak / 1024 / 1024:7.1f} MB  DataFrame {size / 1024 / 1024:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+# リポジトリ直下のモジュールを読み込めるようにする
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import VERSION
+
+# 計測結果の保存先（バージョンごとに記録し、リリース間で比較する）
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "startup.json")
+# 起動時に読み込まれていないことを確認する重いモジュール
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "pyarrow"]
+# -X importtimeの出力（import time: 自身[us] | 累計[us] | モジュール名）
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# 画面を1回描画した時点で出力して終了する
+FIRST_WINDOW_SCRIPT = """
+import tkinter as tk
+import gui
+root = tk.Tk()
+app = gui.AttendanceConverterGUI(root)
+root.update()
+print("shown", flush=True)
+app.on_close()
+"""
+
+
+def import_times(module):
+    """
+    新しいプロセスでmoduleを読み込み、-X importtimeの結果を返す
+    {モジュール名: (自身の時間[秒], 累計の時間[秒], 階層)}
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            times[name] = (int(self_us) / 1e6, int(cumulative_us) / 1e6, len(indent) // 2)
+    return times
+
+
+def first_window_time():
+    """
+    GUIを起動してから最初の画面を描画するまでの時間（秒）を返す
+    画面を表示できない環境ではNoneを返す
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", FIRST_WINDOW_SCRIPT],
+        cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    line = process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    process.wait()
+    return elapsed if line.strip() == "shown" else None
+
+
+def load_results():
+    """保存済みの計測結果 {バージョン: 結果} を読み込む"""
+    if not os.path.exists(RESULTS_PATH):
+        return {}
+    with open(RESULTS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results):
+    """計測結果を保存する"""
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUIの起動時間（モジュールの読み込み・最初の画面表示）を計測する")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（中央値を使う）")
+    parser.add_argument("--top", type=int, default=10, help="表示する読み込みの遅いモジュールの数")
+    parser.add_argument("--label", type=str, default=VERSION, help="結果を保存するときのバージョン名")
+    parser.add_argument("--no-save", action="store_true", help="結果を保存しない")
+    args = parser.parse_args()
+
+    runs = [import_times("gui") for _ in range(args.repeat)]
+    import_time = statistics.median(times["gui"][1] for times in runs)
+    print(f"import gui: {import_time * 1000:.1f} ms（{args.repeat}回の中央値）")
+
+    # 直接読み込んでいるモジュールのうち、累計の時間が長いもの
+    times = runs[-1]
+    slowest = sorted((item for item in times.items() if item[1][2] == 1),
+                     key=lambda item: item[1][1], reverse=True)
+    for name, (_, cumulative, _) in slowest[:args.top]:
+        print(f"  {name:<30} {cumulative * 1000:8.1f} ms")
+
+    loaded = [name for name in HEAVY_MODULES if name in times]
+    if loaded:
+        print(f"⚠️ 起動時に重いモジュールが読み込まれています: {', '.join(loaded)}")
+
+    window_times = [first_window_time() for _ in range(args.repeat)]
+    if None in window_times:
+        first_window = None
+        print("画面を表示できないため、最初の画面表示までの時間は計測しません")
+    else:
+        first_window = statistics.median(window_times)
+        print(f"最初の画面表示まで: {first_window * 1000:.1f} ms（{args.repeat}回の中央値）")
+
+    results = load_results()
+    if not args.no_save:
+        results[args.label] = {
+            "measured_at": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "import_ms": round(import_time * 1000, 1),
+            "first_window_ms": round(first_window * 1000, 1) if first_window is not None else None,
+            "heavy_modules": loaded,
+        }
+        save_results(results)
+        print(f"✅ 結果を保存しました: {RESULTS_PATH}")
+
+    # バージョンごとの比較
+    if results:
+        print(f"\n{'バージョン':<12} {'import gui':>12} {'最初の画面':>12}")
+        for label, result in results.items():
+            first = result["first_window_ms"]
+            print(f"{label:<12} {result['import_ms']:>9.1f} ms "
+                  f"{(f'{first:.1f} ms' if first is not None else '-'):>12}")
+
+
+if __name__ == "__main__":
+    main()
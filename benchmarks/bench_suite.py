@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+# リポジトリ直下のモジュールを読み込めるようにする
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from config import VERSION
+from generate_freee_csv import generate
+
+# 計測結果の保存先（ラベルごとに記録し、前回・指定した結果と比較する）
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "suite.json")
+# 計測する処理（実行順）
+CASES = ["read_csv", "read_csv_rows", "process_data", "write_to_excel",
+         "process_attendance", "batch"]
+
+
+def peak_rss_mb():
+    """このプロセス（と終了した子プロセス）の最大メモリ使用量（MB）。計測できない環境ではNone"""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrssはLinuxではKB、macOSではバイト
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def monthly_csv_paths(work_dir):
+    return sorted(os.path.join(work_dir, "monthly", name)
+                  for name in os.listdir(os.path.join(work_dir, "monthly")))
+
+
+def run_case(case, work_dir, template_path, jobs):
+    """
+    1つの処理を計測し、(行数, ファイル数, 秒) を返す
+    モジュールの読み込みとテンプレートの解析は計測に含めない
+    """
+    from utils import (extract_employee_name, read_csv, read_csv_rows, process_data,
+                       write_to_excel, warm_up_imports, warm_up_template)
+    from main import prepare_attendance, process_attendance, output_filename
+    from batch import run_batch
+
+    warm_up_imports()
+    import pandas  # noqa: F401  小さなCSVの設定に関わらず、pandasの読み込みも計測に含めない
+    large_csv = os.path.join(work_dir, "large.csv")
+    csv_paths = monthly_csv_paths(work_dir)
+    output_dir = os.path.join(work_dir, "output", case)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if case == "read_csv":
+        start = time.perf_counter()
+        rows = len(read_csv(large_csv))
+        return rows, 1, time.perf_counter() - start
+    if case == "read_csv_rows":
+        start = time.perf_counter()
+        rows = len(read_csv_rows(large_csv))
+        return rows, 1, time.perf_counter() - start
+    if case == "process_data":
+        df = read_csv(large_csv)
+        start = time.perf_counter()
+        process_data(df)
+        return len(df), 1, time.perf_counter() - start
+    if case == "write_to_excel":
+        warm_up_template(template_path)
+        prepared = [(csv_path, *prepare_attendance(csv_path, small=False)) for csv_path in csv_paths]
+        start = time.perf_counter()
+        for csv_path, df, year_month in prepared:
+            employee_name = extract_employee_name(os.path.basename(csv_path))
+            output_path = os.path.join(output_dir, output_filename(year_month, employee_name))
+            write_to_excel(template_path, output_path, df, os.path.basename(csv_path))
+        return sum(len(df) for _, df, _ in prepared), len(prepared), time.perf_counter() - start
+
+    rows = sum(len(read_csv_rows(csv_path)) for csv_path in csv_paths)
+    if case == "process_attendance":
+        warm_up_template(template_path)
+        start = time.perf_counter()
+        for csv_path in csv_paths:
+            process_attendance(csv_path, template_path, "社員", output_dir, force=True)
+        return rows, len(csv_paths), time.perf_counter() - start
+    if case == "batch":
+        start = time.perf_counter()
+        results = run_batch(csv_paths, template_path, "社員", jobs=jobs, force=True,
+                            output_dir=output_dir)
+        elapsed = time.perf_counter() - start
+        failed = [result for result in results if result["error"]]
+        if failed:
+            raise RuntimeError(f"{len(failed)}件の変換に失敗しました: {failed[0]['error']}")
+        return rows, len(csv_paths), elapsed
+    raise ValueError(f"不明な処理です: {case}")
+
+
+def measure(case, work_dir, template_path, jobs, repeat=3):
+    """
+    新しいプロセスで1つの処理を計測する（最大メモリ使用量を処理ごとに分けるため）
+    repeat回計測し、処理時間が中央値の回の
+    {"rows_per_s", "files_per_s", "elapsed_s", "peak_rss_mb", ...} を返す
+    """
+    runs = sorted((measure_once(case, work_dir, template_path, jobs) for _ in range(repeat)),
+                  key=lambda run: run["elapsed_s"])
+    return runs[len(runs) // 2]
+
+
+def measure_once(case, work_dir, template_path, jobs):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-case", case, "--work-dir", work_dir,
+         "--template", template_path, "--jobs", str(jobs)],
+        cwd=work_dir, capture_output=True, text=True, encoding="utf-8"
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{case}の計測に失敗しました:\n{result.stderr}")
+    # 変換中の表示に続けて、最後の行に結果のJSONが出力される
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def prepare_data(work_dir, args):
+    """計測用のCSV（大きなCSV1つと、従業員・月ごとのCSV）を作成する"""
+    ratios = (args.holiday_ratio, args.blank_ratio, args.night_ratio)
+    generate(os.path.join(work_dir, "large.csv"), args.employees, args.months, 2025, 0, *ratios)
+
+    os.makedirs(os.path.join(work_dir, "monthly"))
+    for index in range(args.files):
+        employee, month = index // 12 + 1, index % 12 + 1
+        path = os.path.join(work_dir, "monthly",
+                            f"勤怠詳細_社員　{employee:04d}_2025_{month:02d}.csv")
+        generate(path, 1, 1, 2025, index, *ratios, first_employee=employee, first_month=month)
+
+
+def load_results():
+    """保存済みの計測結果 {ラベル: 結果} を読み込む"""
+    if not os.path.exists(RESULTS_PATH):
+        return {}
+    with open(RESULTS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results):
+    """計測結果を保存する"""
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def current_settings():
+    """計測結果に影響するconfig.iniの設定"""
+    from config import get_csv_engine, get_excel_writer, get_fast_path_kb
+    return {"writer": get_excel_writer(), "engine": get_csv_engine(),
+            "fast_path_kb": get_fast_path_kb()}
+
+
+def compare(current, baseline, baseline_label, threshold):
+    """
+    基準の結果と比べ、処理速度がthreshold（割合）以上落ちた処理の数を返す
+    データ量・設定が異なる場合は注意を表示する
+    """
+    print(f"\n「{baseline_label}」（{baseline['measured_at']}）との比較")
+    for key in ("params", "settings"):
+        if current[key] != baseline[key]:
+            print(f"⚠️ {key}が異なります: {baseline[key]} → {current[key]}")
+
+    regressions = 0
+    for case, result in current["cases"].items():
+        before = baseline["cases"].get(case)
+        if not before:
+            continue
+        metric = "files_per_s" if case in ("write_to_excel", "process_attendance", "batch") else "rows_per_s"
+        change = result[metric] / before[metric] - 1
+        mark = ""
+        if change <= -threshold:
+            mark = "  ⚠️ 低下"
+            regressions += 1
+        rss = ""
+        if result["peak_rss_mb"] is not None and before["peak_rss_mb"] is not None:
+            rss = f"  メモリ {before['peak_rss_mb']:.0f} → {result['peak_rss_mb']:.0f} MB"
+        print(f"  {case:<20} {before[metric]:>10.1f} → {result[metric]:>10.1f} {metric}"
+              f" ({change * 100:+6.1f}%){rss}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="読み込み・整形・書き出し・変換全体の速度とメモリ使用量を計測し、保存した結果と比較する"
+    )
+    parser.add_argument("--template", type=str, default=None,
+                        help="テンプレートExcelファイルのパス（省略時はconfig.iniのtemplate_path）")
+    parser.add_argument("--employees", type=int, default=100, help="大きなCSVの従業員数")
+    parser.add_argument("--months", type=int, default=12, help="大きなCSVの月数")
+    parser.add_argument("--files", type=int, default=24, help="変換する従業員・月ごとのCSVの数")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="一括変換のワーカープロセス数")
+    parser.add_argument("--holiday-ratio", type=float, default=0.05, help="平日のうち有給休暇にする割合")
+    parser.add_argument("--blank-ratio", type=float, default=0.05, help="平日のうち未入力にする割合")
+    parser.add_argument("--night-ratio", type=float, default=0.1, help="出勤日のうち22時以降まで働く割合")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数（中央値を使う）")
+    parser.add_argument("--cases", type=str, default=",".join(CASES),
+                        help=f"計測する処理（カンマ区切り、{', '.join(CASES)}）")
+    parser.add_argument("--label", type=str, default=VERSION, help="結果を保存するときのラベル")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="比較する保存済みの結果のラベル（省略時は同じラベルの前回の結果）")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="処理速度がこの割合以上落ちた場合に低下として扱う")
+    parser.add_argument("--no-save", action="store_true", help="結果を保存しない")
+    parser.add_argument("--run-case", type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        # measureから呼ばれた子プロセス: 1つの処理を計測して結果をJSONで出力する
+        rows, files, elapsed = run_case(args.run_case, args.work_dir, args.template, args.jobs)
+        print(json.dumps({"rows": rows, "files": files, "elapsed_s": round(elapsed, 4),
+                          "rows_per_s": round(rows / elapsed, 1),
+                          "files_per_s": round(files / elapsed, 2),
+                          "peak_rss_mb": peak_rss_mb()}))
+        return
+
+    from config import get_template_path
+    template_path = os.path.abspath(os.path.join(ROOT_DIR, args.template or get_template_path()))
+    if not os.path.exists(template_path):
+        raise SystemExit(f"❌ テンプレートが見つかりません: {template_path}")
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        raise SystemExit(f"❌ 不明な処理です: {', '.join(unknown)}")
+
+    work_dir = tempfile.mkdtemp(prefix="kintai_bench_")
+    try:
+        prepare_data(work_dir, args)
+        current = {
+            "measured_at": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "params": {"employees": args.employees, "months": args.months, "files": args.files,
+                       "jobs": args.jobs, "repeat": args.repeat, "holiday_ratio": args.holiday_ratio,
+                       "blank_ratio": args.blank_ratio, "night_ratio": args.night_ratio},
+            "settings": current_settings(),
+            "cases": {},
+        }
+        print(f"{'処理':<20} {'行/秒':>12} {'ファイル/秒':>12} {'秒':>8} {'最大メモリ':>10}")
+        for case in cases:
+            result = measure(case, work_dir, template_path, args.jobs, args.repeat)
+            current["cases"][case] = result
+            rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "-"
+            print(f"{case:<20} {result['rows_per_s']:>12.1f} {result['files_per_s']:>12.2f}"
+                  f" {result['elapsed_s']:>8.3f} {rss:>10}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = load_results()
+    baseline_label = args.baseline or args.label
+    regressions = 0
+    if baseline_label in results:
+        regressions = compare(current, results[baseline_label], baseline_label, args.threshold)
+    elif args.baseline:
+        print(f"⚠️ 保存された結果がありません: {args.baseline}")
+
+    if not args.no_save:
+        results[args.label] = current
+        save_results(results)
+        print(f"✅ 結果を保存しました: {RESULTS_PATH}")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# リポジトリ直下のモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from utils import read_csv, process_data, build_sheet_values, save_with_openpyxl
+from xlsx_writer import write_sheet_values
+
+DEFAULT_CSV = os.path.join("input", "勤怠詳細_小島　知将_2025_02.csv")
+DEFAULT_TEMPLATE = os.path.join("templates", "勤怠表雛形_2025年版.xlsx")
+
+
+def save_uncached(template_path, output_path, sheet_name, values):
+    """キャッシュなしでopenpyxlに書き込む（従来の処理）"""
+    wb = openpyxl.load_workbook(template_path)
+    sheet = wb[sheet_name]
+    for coordinate, value in values.items():
+        sheet[coordinate] = value
+    wb.save(output_path)
+
+
+def measure(writer, template_path, values, count, work_dir):
+    """書き込みをcount回繰り返し、1件あたりの平均秒数を返す"""
+    # 1回目はテンプレートのキャッシュ作成を含むため計測から外す
+    writer(template_path, os.path.join(work_dir, "warmup.xlsx"), "勤務表", values)
+    start = time.perf_counter()
+    for i in range(count):
+        writer(template_path, os.path.join(work_dir, f"out_{i}.xlsx"), "勤務表", values)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel書き込み方法ごとの処理時間を比較する")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="入力CSVファイル")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE, help="テンプレートExcelファイル")
+    parser.add_argument("--count", type=int, default=50, help="繰り返し回数")
+    args = parser.parse_args()
+
+    df = process_data(read_csv(args.csv))
+    values = build_sheet_values(df, "ベンチマーク")
+
+    writers = [
+        ("openpyxl（キャッシュなし）", save_uncached),
+        ("openpyxl（テンプレートキャッシュ）", save_with_openpyxl),
+        ("xml（シートXML直接書き換え）", write_sheet_values),
+    ]
+    with tempfile.TemporaryDirectory() as work_dir:
+        baseline = None
+        for label, writer in writers:
+            elapsed = measure(writer, args.template, values, args.count, work_dir)
+            baseline = baseline or elapsed
+            print(f"{label:<32} {elapsed * 1000:8.2f} ms/件  {1 / elapsed:8.1f} 件/秒  x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import csv
+import random
+import argparse
+from datetime import date, timedelta
+
+# freeeの勤怠詳細CSVと同じ列
+HEADER = ["氏名", "従業員番号", "勤務・賃金設定", "日付", "曜日", "始業時刻", "終業時刻", "休憩時間",
+          "総勤務時間", "法定内残業", "時間外労働", "深夜労働", "勤怠種別", "遅刻", "早退", "備考"]
+WEEKDAYS = "月火水木金土日"
+
+
+def hhmm(minutes):
+    """分をHH:MM形式にする"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def month_days(year, month):
+    """指定した月の日付を順に返す"""
+    day = date(year, month, 1)
+    while day.month == month:
+        yield day
+        day += timedelta(days=1)
+
+
+def attendance_row(rng, name, employee_id, day, holiday_ratio=0.0, blank_ratio=0.0, night_ratio=0.0):
+    """
+    1日分の行を作る
+    平日はholiday_ratioの割合で有給休暇、blank_ratioの割合で未入力（時刻が空欄）、
+    night_ratioの割合で22時以降まで働いた日（深夜労働あり）にする
+    """
+    weekday = WEEKDAYS[day.weekday()]
+    if day.weekday() >= 5:
+        kind = "法定休日" if day.weekday() == 6 else "所定休日"
+        return [name, employee_id, "社員", day.isoformat(), weekday, "", "", "00:00",
+                "00:00", "00:00", "00:00", "00:00", kind, "", "", ""]
+
+    roll = rng.random()
+    if roll < holiday_ratio:
+        return [name, employee_id, "社員", day.isoformat(), weekday, "", "", "00:00",
+                "08:00", "00:00", "00:00", "00:00", "有給休暇", "", "", ""]
+    if roll < holiday_ratio + blank_ratio:
+        return [name, employee_id, "社員", day.isoformat(), weekday, "", "", "00:00",
+                "00:00", "00:00", "00:00", "00:00", "未入力", "", "", ""]
+
+    start = 9 * 60 + rng.choice([0, 0, 0, 15, 30])
+    if rng.random() < night_ratio:
+        # 22時から翌2時までの間に退勤（24時以降は「25:30」のように表す）
+        end = 22 * 60 + rng.choice([15, 30, 60, 90, 120, 180, 240])
+    else:
+        end = start + 9 * 60 + rng.choice([0, 0, 15, 30, 60, 90, 120, 240])
+    worked = end - start - 60
+    overtime = max(0, worked - 8 * 60)
+    night = max(0, end - 22 * 60)
+    return [name, employee_id, "社員", day.isoformat(), weekday, hhmm(start), hhmm(end), "01:00",
+            hhmm(worked), "00:00", hhmm(overtime), hhmm(night), "通常勤務", "", "", ""]
+
+
+def generate(path, employees=1, months=1, year=2025, seed=0, holiday_ratio=0.0, blank_ratio=0.0,
+             night_ratio=0.0, first_employee=1, first_month=1):
+    """
+    freeeの勤怠詳細CSVに似たデータを作成する（従業員・日付の順）
+    従業員番号はfirst_employeeから、月はyear年first_month月から順に作る
+    作成した行数を返す
+    """
+    rng = random.Random(seed)
+    rows = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for employee in range(first_employee, first_employee + employees):
+            name = f"社員　{employee:04d}"
+            for month in range(first_month, first_month + months):
+                for day in month_days(year + (month - 1) // 12, (month - 1) % 12 + 1):
+                    writer.writerow(attendance_row(rng, name, employee, day,
+                                                   holiday_ratio, blank_ratio, night_ratio))
+                    rows += 1
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="freeeの勤怠詳細CSVに似たテストデータを作成する")
+    parser.add_argument("output", help="出力するCSVファイルのパス")
+    parser.add_argument("--employees", type=int, default=1, help="従業員数")
+    parser.add_argument("--months", type=int, default=1, help="月数")
+    parser.add_argument("--year", type=int, default=2025, help="開始年")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    parser.add_argument("--holiday-ratio", type=float, default=0.0, help="平日のうち有給休暇にする割合")
+    parser.add_argument("--blank-ratio", type=float, default=0.0, help="平日のうち未入力（時刻が空欄）にする割合")
+    parser.add_argument("--night-ratio", type=float, default=0.0, help="出勤日のうち22時以降まで働く割合")
+    args = parser.parse_args()
+
+    rows = generate(args.output, args.employees, args.months, args.year, args.seed,
+                    args.holiday_ratio, args.blank_ratio, args.night_ratio)
+    print(f"✅ {rows}行のCSVを作成しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
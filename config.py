@@ -3,6 +3,9 @@ import sys
 import configparser
 from pathlib import Path
 
+# ツールのバージョン（exeのファイル名の「ver.」と合わせる）
+VERSION = "1.0"
+
 def get_config_path():
     """実行ファイルと同じディレクトリのconfig.iniのパスを返す"""
     if getattr(sys, 'frozen', False):
@@ -30,29 +33,77 @@ def create_default_config():
     
     config['CSV'] = {
         'encoding': 'utf-8',
-        'date_format': '%Y-%m-%d'
+        'date_format': '%Y-%m-%d',
+        'engine': 'c',  # c / python / pyarrow
+        'fast_path_kb': '256'  # この大きさ（KB）以下のCSVはpandasを使わずに読む（0で無効）
+    }
+    
+    config['EXCEL'] = {
+        'writer': 'openpyxl'  # openpyxl / xml / builtin
+    }
+    
+    config['PERFORMANCE'] = {
+        'workers': '0'  # 0はCPUコア数に合わせる
+    }
+    
+    config['CACHE'] = {
+        'dir': 'cache',
+        'max_mb': '256'  # 整形済みCSVのキャッシュの上限（MB、0で無効）
     }
     
     # 設定ファイルを保存
     with open(get_config_path(), 'w', encoding='utf-8') as f:
         config.write(f)
 
+# 読み込み済みの設定と、そのときのconfig.iniの更新日時・サイズ
+_config_cache = None
+_config_stamp = None
+
+def _config_file_stamp(config_path):
+    """config.iniの更新日時とサイズを返す。ない場合はNone"""
+    try:
+        stat = config_path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
 def load_config():
-    """設定を読み込む。ない場合は作成する"""
-    config = configparser.ConfigParser(interpolation=None)  # 補間を無効化
+    """設定を読み込む。ない場合は作成する
+    
+    config.iniが更新されるまでは、前回読み込んだ設定をそのまま返す
+    """
+    global _config_cache, _config_stamp
     config_path = get_config_path()
+    stamp = _config_file_stamp(config_path)
     
     # config.iniが存在しない場合、デフォルト設定で作成
-    if not config_path.exists():
+    if stamp is None:
         create_default_config()
+        stamp = _config_file_stamp(config_path)
     
-    config.read(config_path, encoding='utf-8')
-    return config
+    if _config_cache is None or stamp != _config_stamp:
+        config = configparser.ConfigParser(interpolation=None)  # 補間を無効化
+        config.read(config_path, encoding='utf-8')
+        _config_cache = config
+        _config_stamp = stamp
+    return _config_cache
+
+def reload():
+    """キャッシュを破棄してconfig.iniを読み直す"""
+    global _config_cache, _config_stamp
+    _config_cache = None
+    _config_stamp = None
+    return load_config()
 
 def save_config(config):
     """設定を保存する"""
-    with open(get_config_path(), 'w', encoding='utf-8') as f:
+    global _config_cache, _config_stamp
+    config_path = get_config_path()
+    with open(config_path, 'w', encoding='utf-8') as f:
         config.write(f)
+    # 書き込んだ内容をそのままキャッシュとして使う
+    _config_cache = config
+    _config_stamp = _config_file_stamp(config_path)
 
 def get_default_employee_name():
     return load_config()['DEFAULT']['employee_name']
@@ -72,6 +123,38 @@ def get_csv_encoding():
 def get_date_format():
     return load_config()['CSV']['date_format']
 
+def get_csv_engine():
+    """CSVの読み込みエンジン（c / python / pyarrow）"""
+    return load_config().get('CSV', 'engine', fallback='c').strip().lower()
+
+def get_csv_settings():
+    """[CSV]セクションの設定（DEFAULTセクションの値は含めない）"""
+    config = load_config()
+    return {key: value for key, value in config.items('CSV') if key not in config.defaults()}
+
+def get_fast_path_kb():
+    """pandasを使わずに読み込むCSVの大きさの上限（KB、0以下は無効）"""
+    return load_config().getint('CSV', 'fast_path_kb', fallback=256)
+
+def get_excel_writer():
+    """Excelの書き込み方法（openpyxl / xml / builtin）"""
+    return load_config().get('EXCEL', 'writer', fallback='openpyxl').strip().lower()
+
+def get_workers():
+    """一括処理の並列プロセス数（0以下はCPUコア数）"""
+    workers = load_config().getint('PERFORMANCE', 'workers', fallback=0)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+def get_cache_dir():
+    """整形済みCSVのキャッシュのフォルダ"""
+    return load_config().get('CACHE', 'dir', fallback='cache')
+
+def get_cache_max_mb():
+    """整形済みCSVのキャッシュの上限（MB、0以下は無効）"""
+    return load_config().getint('CACHE', 'max_mb', fallback=256)
+
 def update_config(name, template):
     """config.iniに氏名とテンプレートファイルのパスを保存"""
     config = load_config()
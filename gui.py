@@ -2,13 +2,30 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import sys
+import time
+import multiprocessing
+import threading
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from tkinter.font import Font
 from config import (get_input_dir, get_template_path, get_output_dir,
-                   get_default_employee_name, update_config)
-from main import process_attendance
-from utils import open_folder, setup_directories
+                   get_default_employee_name, get_workers, update_config)
+from main import STAGES
+from profiling import StageStats
+from batch import QueueProgress, convert_one, employee_name_for, find_csv_files
+from utils import open_folder, setup_directories, warm_up_imports
+
+# 一覧に表示する処理段階の名前
+STAGE_LABELS = {
+    "read": "読み込み中",
+    "process": "整形中",
+    "write": "書き込み中",
+    "save": "保存中",
+}
+
+# ジョブの状態
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "待機中", "実行中", "完了", "失敗", "中止"
 
 class AttendanceConverterGUI:
     def __init__(self, root):
@@ -57,50 +74,90 @@ class AttendanceConverterGUI:
         ttk.Label(self.main_frame, text="CSVファイル:", style='Field.TLabel').grid(
             row=1, column=0, sticky="w", pady=10
         )
-        self.csv_entry = ttk.Entry(self.main_frame, width=50, font=('Yu Gothic UI', 10))
-        self.csv_entry.grid(row=1, column=1, padx=5, pady=10)
+        csv_button_frame = ttk.Frame(self.main_frame, style='Main.TFrame')
+        csv_button_frame.grid(row=1, column=1, columnspan=2, sticky="w", padx=5, pady=10)
         ttk.Button(
-            self.main_frame, 
-            text="参照", 
+            csv_button_frame, 
+            text="ファイルを追加", 
             command=self.select_csv,
             style='Custom.TButton'
-        ).grid(row=1, column=2, padx=(10, 0), pady=10)
+        ).pack(side=tk.LEFT)
+        ttk.Button(
+            csv_button_frame, 
+            text="フォルダを追加", 
+            command=self.select_csv_folder,
+            style='Custom.TButton'
+        ).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(
+            csv_button_frame, 
+            text="一覧をクリア", 
+            command=self.clear_jobs,
+            style='Custom.TButton'
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
+        # 変換待ちの一覧
+        self.job_tree = ttk.Treeview(
+            self.main_frame,
+            columns=("file", "name", "status", "elapsed"),
+            show="headings",
+            height=6
+        )
+        self.job_tree.heading("file", text="ファイル")
+        self.job_tree.heading("name", text="従業員名")
+        self.job_tree.heading("status", text="状態")
+        self.job_tree.heading("elapsed", text="経過時間")
+        self.job_tree.column("file", width=300)
+        self.job_tree.column("name", width=100)
+        self.job_tree.column("status", width=90, anchor="center")
+        self.job_tree.column("elapsed", width=70, anchor="e")
+        self.job_tree.grid(row=2, column=0, columnspan=3, sticky="nsew", pady=(0, 10))
         
         # テンプレート選択
         ttk.Label(self.main_frame, text="テンプレート:", style='Field.TLabel').grid(
-            row=2, column=0, sticky="w", pady=10
+            row=3, column=0, sticky="w", pady=10
         )
         self.template_entry = ttk.Entry(self.main_frame, width=50, font=('Yu Gothic UI', 10))
-        self.template_entry.grid(row=2, column=1, padx=5, pady=10)
+        self.template_entry.grid(row=3, column=1, padx=5, pady=10)
         self.template_entry.insert(0, get_template_path())
         ttk.Button(
             self.main_frame, 
             text="参照", 
             command=self.select_template,
             style='Custom.TButton'
-        ).grid(row=2, column=2, padx=(10, 0), pady=10)
+        ).grid(row=3, column=2, padx=(10, 0), pady=10)
         
         # 従業員名入力
         ttk.Label(self.main_frame, text="従業員名:", style='Field.TLabel').grid(
-            row=3, column=0, sticky="w", pady=10
+            row=4, column=0, sticky="w", pady=10
         )
         self.name_entry = ttk.Entry(self.main_frame, width=50, font=('Yu Gothic UI', 10))
-        self.name_entry.grid(row=3, column=1, padx=5, pady=10)
+        self.name_entry.grid(row=4, column=1, padx=5, pady=10)
         self.name_entry.insert(0, get_default_employee_name())
         
         # ボタンフレーム
         button_frame = ttk.Frame(self.main_frame, style='Main.TFrame')
-        button_frame.grid(row=4, column=0, columnspan=3, pady=(30,20))
+        button_frame.grid(row=5, column=0, columnspan=3, pady=(30,20))
         
         # 変換ボタン
-        convert_button = ttk.Button(
+        self.convert_button = ttk.Button(
             button_frame,
             text="変換実行",
             command=self.convert,
             style='Custom.TButton',
             width=15
         )
-        convert_button.pack(side=tk.LEFT, padx=10)
+        self.convert_button.pack(side=tk.LEFT, padx=10)
+
+        # 中止ボタン（変換中のみ有効）
+        self.cancel_button = ttk.Button(
+            button_frame,
+            text="中止",
+            command=self.cancel,
+            style='Custom.TButton',
+            width=15,
+            state=tk.DISABLED
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=10)
 
         # フォルダを開くボタン
         open_folder_button = ttk.Button(
@@ -112,29 +169,136 @@ class AttendanceConverterGUI:
         )
         open_folder_button.pack(side=tk.LEFT, padx=10)
         
+        # 進捗バー
+        self.progress_bar = ttk.Progressbar(
+            self.main_frame,
+            mode='determinate',
+            maximum=len(STAGES)
+        )
+        self.progress_bar.grid(row=6, column=0, columnspan=3, sticky="ew", pady=(10, 0))
+
         # ステータス表示
         self.status_label = ttk.Label(
             self.main_frame, 
             text="", 
             style='Status.TLabel'
         )
-        self.status_label.grid(row=5, column=0, columnspan=3, pady=(10, 0))
+        self.status_label.grid(row=7, column=0, columnspan=3, pady=(10, 0))
+
+        # 処理段階ごとの時間（直前の変換の集計）
+        timing_frame = ttk.LabelFrame(self.main_frame, text="処理時間", padding=10)
+        timing_frame.grid(row=8, column=0, columnspan=3, sticky="ew", pady=(20, 0))
+        self.timing_tree = ttk.Treeview(
+            timing_frame,
+            columns=("stage", "count", "total", "mean", "max"),
+            show="headings",
+            height=6
+        )
+        for column, text, width in (("stage", "処理段階", 160), ("count", "回数", 60),
+                                    ("total", "合計", 80), ("mean", "平均", 80),
+                                    ("max", "最大", 80)):
+            self.timing_tree.heading(column, text=text)
+            self.timing_tree.column(column, width=width, anchor="w" if column == "stage" else "e")
+        self.timing_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.save_timing_button = ttk.Button(
+            timing_frame,
+            text="JSONに保存",
+            command=self.save_timings,
+            style='Custom.TButton',
+            state=tk.DISABLED
+        )
+        self.save_timing_button.pack(side=tk.LEFT, padx=(10, 0), anchor="n")
+        self.stage_stats = None
+        self.run_elapsed = None
+
+        # 変換ジョブ {一覧の行ID: ジョブの情報}
+        self.jobs = {}
+        self.running = False
+        self.run_items = []
+        # 変換はプロセスプールで行い、進捗はManagerのキューでroot.afterにより受け取る
+        self.executor = None
+        self.manager = None
+        self.events = None
+        self.cancel_event = None
+        self.workers_lock = threading.Lock()
+        self.closed = False
         
         # グリッド設定
         root.columnconfigure(0, weight=1)
         root.rowconfigure(0, weight=1)
         self.main_frame.columnconfigure(1, weight=1)
+        self.main_frame.rowconfigure(2, weight=1)
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 画面を表示してから、裏でワーカープロセスを起動しておく
+        # （pandas・openpyxlの読み込みを起動時ではなく変換前に済ませる）
+        root.after(100, lambda: threading.Thread(target=self.start_workers, daemon=True).start())
 
     def select_csv(self):
-        """CSVファイルを選択する"""
-        file_path = filedialog.askopenfilename(
+        """CSVファイルを選択して一覧に追加する（複数選択可）"""
+        file_paths = filedialog.askopenfilenames(
             initialdir=get_input_dir(),
             title="CSVファイルを選択",
             filetypes=[("CSV files", "*.csv")]
         )
-        if file_path:
-            self.csv_entry.delete(0, tk.END)
-            self.csv_entry.insert(0, file_path)
+        for file_path in file_paths:
+            self.add_job(file_path)
+
+    def select_csv_folder(self):
+        """フォルダを選択し、中の勤怠詳細CSVをすべて一覧に追加する"""
+        folder = filedialog.askdirectory(
+            initialdir=get_input_dir(),
+            title="CSVファイルのフォルダを選択"
+        )
+        if not folder:
+            return
+        file_paths = find_csv_files(folder)
+        if not file_paths:
+            messagebox.showwarning("CSVファイル", "フォルダに勤怠詳細のCSVファイルがありません。")
+        for file_path in file_paths:
+            self.add_job(file_path)
+
+    def add_job(self, csv_path):
+        """CSVファイルを変換待ちの一覧に追加する（追加済みで終了したものは待機中に戻す）"""
+        for item, job in self.jobs.items():
+            if job["csv_path"] == csv_path:
+                if job["status"] in (DONE, FAILED, CANCELLED) and not self.running:
+                    job.update(status=QUEUED, stage=0, start=None, elapsed=None, future=None,
+                               skipped=False, timings=None)
+                    self.update_job(item)
+                return
+        item = self.job_tree.insert(
+            "", tk.END, values=(os.path.basename(csv_path), "", QUEUED, "")
+        )
+        self.jobs[item] = {"csv_path": csv_path, "status": QUEUED, "stage": 0,
+                           "start": None, "elapsed": None, "future": None, "skipped": False,
+                           "timings": None}
+
+    def clear_jobs(self):
+        """変換中でなければ一覧を空にする"""
+        if self.running:
+            return
+        self.job_tree.delete(*self.job_tree.get_children())
+        self.jobs.clear()
+        self.progress_bar.config(value=0)
+
+    def update_job(self, item):
+        """一覧の1行を最新の状態で表示し直す"""
+        job = self.jobs[item]
+        status = job["status"]
+        if status == RUNNING:
+            status = f"{RUNNING}（{STAGE_LABELS[STAGES[job['stage']]]}）"
+        elif status == DONE and job["skipped"]:
+            status = f"{DONE}（変更なし）"
+        elapsed = job["elapsed"]
+        if elapsed is None and job["start"] is not None:
+            elapsed = time.perf_counter() - job["start"]
+        self.job_tree.item(item, values=(
+            os.path.basename(job["csv_path"]),
+            job.get("name", ""),
+            status,
+            f"{elapsed:.1f}秒" if elapsed is not None else ""
+        ))
 
     def select_template(self):
         """テンプレートファイルを選択する"""
@@ -149,46 +313,233 @@ class AttendanceConverterGUI:
             update_config(self.name_entry.get(), file_path)
 
     def convert(self):
-        """変換処理を実行する"""
-        csv_path = self.csv_entry.get()
+        """待機中のジョブをプロセスプールで並列に変換する"""
         template_path = self.template_entry.get()
         name = self.name_entry.get()
+        queued = [item for item, job in self.jobs.items() if job["status"] == QUEUED]
 
-        if not csv_path or not template_path or not name:
+        # テンプレートが空欄の場合は組み込みのレイアウトで作成する
+        if not queued or not name:
             messagebox.showerror("エラー", "すべての項目を入力してください。")
             return
+        if self.running:
+            return
+
+        self.start_workers()
+        self.cancel_event.clear()
+
+        self.running = True
+        self.run_items = queued
+        self.run_start = time.perf_counter()
+        self.run_template = template_path
+        self.run_name = name
+        self.convert_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.config(value=0, maximum=len(queued) * len(STAGES))
+        self.status_label.config(text=f"変換中...（{len(queued)}件）", foreground="#1a73e8")
 
+        output_dir = get_output_dir()
+        os.makedirs(output_dir, exist_ok=True)
         try:
-            self.status_label.config(text="変換中...", foreground="#1a73e8")
-            self.root.update()
-            
-            process_attendance(
-                csv_path=csv_path,
-                template_path=template_path,
-                employee_name=name
-            )
-            
+            for item in queued:
+                job = self.jobs[item]
+                # 1件だけの場合は入力された従業員名、複数の場合はCSVファイル名の従業員名を使う
+                job["name"] = name if len(queued) == 1 else employee_name_for(job["csv_path"], name)
+                job["future"] = self.executor.submit(
+                    convert_one, job["csv_path"], template_path, job["name"], output_dir,
+                    progress=QueueProgress(item, self.events, self.cancel_event)
+                )
+                self.update_job(item)
+        except Exception as e:
+            # ワーカープロセスが異常終了してプールが使えなくなっている場合
+            print(f"❌ 変換を開始できませんでした: {type(e).__name__}: {e}")
+            for item in queued:
+                future = self.jobs[item]["future"]
+                if future is not None:
+                    future.cancel()
+                self.jobs[item]["future"] = None
+                self.update_job(item)
+            self.restart_workers()
+            self.running = False
+            self.convert_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            self.progress_bar.config(value=0)
             self.status_label.config(
-                text="✅ 変換が完了しました！", 
-                foreground="#34a853"
+                text="❌ ワーカープロセスを起動し直しました。もう一度変換してください",
+                foreground="#ea4335"
             )
-            # 変換完了時にoutputフォルダを開く
+            return
+
+        self.root.after(100, self.poll_events)
+
+    def start_workers(self):
+        """
+        プロセスプールと進捗用のManagerを起動する（起動済みの場合は何もしない）
+        ワーカープロセスは使い回し、テンプレートのキャッシュを活かす
+        """
+        with self.workers_lock:
+            if self.executor is not None or self.closed:
+                return
+            manager = multiprocessing.Manager()
+            self.events = manager.Queue()
+            self.cancel_event = manager.Event()
+            self.manager = manager
+            # ワーカープロセスでは変換に使うモジュールとconfig.iniのテンプレートだけを準備する
+            workers = get_workers()
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up_imports,
+                                           initargs=(get_template_path(),))
+            # タスクを渡した時点でワーカープロセスが起動し、重いモジュールを読み込む
+            # spawn（Windows）では空いているワーカーがなければ1つずつ起動するため、ワーカー数だけ渡す
+            # （完了は待たない）
+            for _ in range(workers):
+                executor.submit(warm_up_imports)
+            self.executor = executor
+
+    def restart_workers(self):
+        """異常終了したワーカープロセスがあり使えなくなったプロセスプールを破棄し、起動し直す"""
+        with self.workers_lock:
+            executor, manager = self.executor, self.manager
+            self.executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            manager.shutdown()
+        self.start_workers()
+
+    def poll_events(self):
+        """ワーカープロセスからの進捗と結果を取り出して画面に反映する"""
+        while not self.events.empty():
+            item, stage = self.events.get()
+            job = self.jobs.get(item)
+            if job is None:
+                continue
+            if job["status"] == QUEUED:
+                job["status"] = RUNNING
+                job["start"] = time.perf_counter()
+            job["stage"] = STAGES.index(stage)
+
+        for item in self.run_items:
+            job = self.jobs[item]
+            if job["status"] in (QUEUED, RUNNING) and job["future"].done():
+                self.finish_job(item)
+            self.update_job(item)
+
+        jobs = [self.jobs[item] for item in self.run_items]
+        finished = [job for job in jobs if job["status"] in (DONE, FAILED, CANCELLED)]
+        # 終わったジョブは全段階分、実行中のジョブは進んだ段階分を進捗とする
+        self.progress_bar.config(
+            value=len(finished) * len(STAGES)
+            + sum(job["stage"] for job in jobs if job["status"] == RUNNING)
+        )
+
+        if len(finished) < len(jobs):
+            self.root.after(100, self.poll_events)
+        else:
+            self.finish_conversion()
+
+    def finish_job(self, item):
+        """1件分のジョブの結果を反映する"""
+        job = self.jobs[item]
+        future = job["future"]
+        if future.cancelled():
+            job["status"] = CANCELLED
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            # ワーカープロセス自体が異常終了した場合
+            result = {"error": f"{type(e).__name__}: {e}", "elapsed": None}
+        job["elapsed"] = result["elapsed"]
+        job["timings"] = result.get("timings")
+        if result["error"] is None:
+            job["status"] = DONE
+            job["skipped"] = result["skipped"]
+        elif self.cancel_event.is_set():
+            job["status"] = CANCELLED
+        else:
+            job["status"] = FAILED
+            job["error"] = result["error"]
+            print(f"❌ {job['csv_path']}: {result['error']}")
+
+    def finish_conversion(self):
+        """すべてのジョブの終了を画面に反映する"""
+        self.running = False
+        self.convert_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+
+        jobs = [self.jobs[item] for item in self.run_items]
+        self.show_timings(jobs)
+        done = sum(1 for job in jobs if job["status"] == DONE)
+        failed = [job for job in jobs if job["status"] == FAILED]
+        cancelled = sum(1 for job in jobs if job["status"] == CANCELLED)
+
+        if done:
+            # 変換完了時にoutputフォルダを開く（何件変換しても1回だけ）
             open_folder(get_output_dir())
-            messagebox.showinfo("完了", "変換が完了しました！")
-            
             # 設定を保存
-            update_config(name, template_path)
-            
-        except Exception as e:
-            error_msg = f"エラーが発生しました:\n{str(e)}\n\n"
-            error_msg += "詳細:\n" + traceback.format_exc()
-            print(error_msg)
-            
+            update_config(self.run_name, self.run_template)
+
+        summary = f"完了 {done}件 / 失敗 {len(failed)}件 / 中止 {cancelled}件"
+        if failed:
+            self.status_label.config(text=f"❌ {summary}", foreground="#ea4335")
+            error_msg = "\n".join(
+                f"{os.path.basename(job['csv_path'])}: {job['error']}" for job in failed
+            )
+            messagebox.showerror("エラー", f"エラーが発生しました:\n{error_msg}")
+        elif cancelled:
+            self.status_label.config(text=f"変換を中止しました（{summary}）", foreground="#ea4335")
+        else:
             self.status_label.config(
-                text="❌ エラーが発生しました", 
-                foreground="#ea4335"
+                text="✅ 変換が完了しました！", 
+                foreground="#34a853"
             )
-            messagebox.showerror("エラー", error_msg)
+            messagebox.showinfo("完了", f"変換が完了しました！（{done}件）")
+
+    def show_timings(self, jobs):
+        """変換したジョブの処理段階ごとの時間を集計して表示する"""
+        self.run_elapsed = time.perf_counter() - self.run_start
+        self.stage_stats = StageStats.from_results(jobs)
+        self.timing_tree.delete(*self.timing_tree.get_children())
+        for _, label, count, total, mean, longest in self.stage_stats.rows():
+            self.timing_tree.insert("", tk.END, values=(
+                label, count, f"{total:.2f}秒", f"{mean * 1000:.1f}ms", f"{longest * 1000:.1f}ms"
+            ))
+        self.save_timing_button.config(
+            state=tk.NORMAL if self.stage_stats.files else tk.DISABLED
+        )
+
+    def save_timings(self):
+        """処理段階ごとの時間をJSONファイルに保存する"""
+        file_path = filedialog.asksaveasfilename(
+            initialdir=get_output_dir(),
+            initialfile="処理時間.json",
+            title="処理時間の保存先",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if file_path:
+            self.stage_stats.save_json(file_path, self.run_elapsed)
+            self.status_label.config(text=f"✅ 処理時間を保存しました: {file_path}",
+                                     foreground="#34a853")
+
+    def cancel(self):
+        """待機中のジョブを取り消し、実行中のジョブは次の処理段階に進む前に止める"""
+        self.cancel_event.set()
+        for item in self.run_items:
+            future = self.jobs[item]["future"]
+            if future is not None:
+                future.cancel()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.status_label.config(text="中止しています...", foreground="#ea4335")
+
+    def on_close(self):
+        """ウィンドウを閉じる（変換中のジョブは中止する）"""
+        with self.workers_lock:
+            self.closed = True
+            if self.executor is not None:
+                self.cancel_event.set()
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.manager.shutdown()
+        self.root.destroy()
 
     def open_output_folder(self):
         """出力フォルダを開く"""
@@ -216,4 +567,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # PyInstallerでexe化した場合にプロセスプールを使うため
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,153 @@
+import re
+from profiling import timed
+
+# テンプレートを使わず、openpyxlのwrite_onlyモードで勤務表シートを1行ずつ書き出す
+# テンプレートの読み込み・セルの保持をしないため、行数が多くてもメモリ使用量が一定で速い
+# レイアウトは同梱のテンプレート（勤怠表雛形_2025年版.xlsx）の勤務表シートに合わせている
+
+BUILTIN_SHEET_NAME = "勤務表"
+FIRST_DAY_ROW = 11
+# 日付の行数の最小値（1か月分。値がない日の行も数式で日付を表示する）
+MIN_DAY_ROWS = 31
+COLUMN_WIDTHS = {"A": 4.4, "B": 5.5, "C": 12.7, "D": 12.7, "E": 10.0, "F": 10.0, "G": 10.0,
+                 "H": 10.0, "I": 12.0}
+HEADERS = ["日", "曜日", "始業時間", "終業時間", "休憩時間", "勤務時間", "経費", "詳細・備考", None]
+YEN_FORMAT = '"¥"#,##0;[Red]"¥"\\-#,##0'
+CELL_RE = re.compile(r'([A-Z]+)(\d+)')
+
+
+def make_styles():
+    """
+    セルの書式を {名前: {属性: 値}} で返す
+    WriteOnlyCellに設定するため、同じ書式のオブジェクトを使い回す
+    """
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    font = Font(name="HGS明朝B", size=12)
+    center = Alignment(horizontal="center", vertical="center")
+    hair, thin, medium = Side(style="hair"), Side(style="thin"), Side(style="medium")
+    return {
+        "title": {"font": Font(name="HGS明朝B", size=20, bold=True), "alignment": center},
+        "month": {"font": Font(name="HGS明朝B", size=12, bold=True),
+                  "alignment": Alignment(horizontal="right", vertical="center")},
+        "box": {"font": font, "alignment": center,
+                "border": Border(left=thin, right=thin, top=thin, bottom=thin)},
+        "header": {"font": font, "alignment": center,
+                   "border": Border(left=hair, right=hair, top=medium, bottom=Side(style="double"))},
+        "date": {"font": font, "alignment": center, "number_format": "d",
+                 "border": Border(left=medium, right=hair, bottom=hair)},
+        "time": {"font": font, "alignment": center, "number_format": "h:mm",
+                 "border": Border(left=hair, right=hair, bottom=hair)},
+        "day": {"font": font, "alignment": center, "border": Border(left=hair, right=hair, bottom=hair)},
+        "yen": {"font": font, "alignment": center, "number_format": YEN_FORMAT,
+                "border": Border(left=hair, right=hair, bottom=hair)},
+        "note": {"font": font, "alignment": center, "border": Border(left=hair, right=medium, bottom=hair)},
+        "total": {"font": font, "alignment": Alignment(horizontal="distributed", vertical="center"),
+                  "border": Border(left=medium, top=hair, bottom=medium)},
+        "sum": {"font": font, "alignment": center,
+                "border": Border(left=hair, right=hair, top=hair, bottom=medium)},
+        "sum_yen": {"font": font, "alignment": center, "number_format": YEN_FORMAT,
+                    "border": Border(left=hair, right=medium, top=hair, bottom=medium)},
+    }
+
+
+def style_arrays(sheet, styles):
+    """
+    書式ごとのスタイル番号の組（StyleArray）を返す
+    セルごとに書式の属性を設定するとブックの書式一覧の検索が毎回走るため、1度だけ設定して複製する
+    """
+    from openpyxl.cell import WriteOnlyCell
+
+    arrays = {}
+    for style_name, style in styles.items():
+        cell = WriteOnlyCell(sheet)
+        for name, attribute in style.items():
+            setattr(cell, name, attribute)
+        arrays[style_name] = cell._style
+    return arrays
+
+
+def day_row_values(row, values):
+    """日付の行（FIRST_DAY_ROW以降）のA〜I列の値。valuesにない列はテンプレートと同じ数式にする"""
+    previous = row - 1
+    date = values.get(f"A{row}")
+    if date is None:
+        date = ("=DATE(F5,H5,1)" if row == FIRST_DAY_ROW else
+                f'=IF(A{previous}="","",(IF(DAY(A{previous}+1)=1,"",A{previous}+1)))')
+    hours = values.get(f"F{row}")
+    if hours is None:
+        hours = f"=(DAY(D{row}-C{row})*24+HOUR(D{row}-C{row})+ROUND(MINUTE(D{row}-C{row})/60,2))-E{row}"
+    return [date, f'=IF(A{row}="","",TEXT(WEEKDAY(A{row}),"aaa"))', values.get(f"C{row}"),
+            values.get(f"D{row}"), values.get(f"E{row}"), hours, values.get(f"G{row}"),
+            values.get(f"H{row}"), None]
+
+
+def last_day_row(values):
+    """日付の最後の行（valuesに日付の行が31日分より多くあればその行まで）"""
+    rows = [int(match.group(2)) for match in map(CELL_RE.fullmatch, values) if match]
+    return max([FIRST_DAY_ROW + MIN_DAY_ROWS - 1] + [row for row in rows if row >= FIRST_DAY_ROW])
+
+
+def write_builtin_sheet(output_path, values, sheet_name=BUILTIN_SHEET_NAME):
+    """
+    組み込みのレイアウトで勤務表シートを作り、values（{セル番地: 値}）を書き込んで保存する
+    valuesはbuild_sheet_valuesと同じ形式（空の場合は値のないひな型になる）
+    output_pathはファイルパスまたはバイナリのファイルオブジェクト
+    """
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    with timed("save"):
+        add_builtin_sheet(wb, values, sheet_name)
+        wb.save(output_path)
+
+
+def add_builtin_sheet(wb, values, sheet_name=BUILTIN_SHEET_NAME):
+    """write_onlyのWorkbookに組み込みのレイアウトのシートを追加し、valuesを書き込む"""
+    from copy import copy
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+
+    sheet = wb.create_sheet(sheet_name)
+    styles = style_arrays(sheet, make_styles())
+    last_row = last_day_row(values)
+
+    for column, width in COLUMN_WIDTHS.items():
+        sheet.column_dimensions[column].width = width
+    sheet.print_options.horizontalCentered = True
+    sheet.page_setup.orientation = "portrait"
+    sheet.page_setup.paperSize = "9"  # A4
+    merged = ["A2:I3", "F6:F7", "G6:I7"]
+    merged += [f"H{row}:I{row}" for row in range(FIRST_DAY_ROW - 1, last_row + 1)]
+    # merged_cells.addは重なりを1件ずつ調べるため、まとめて作る
+    sheet.merged_cells = MultiCellRange([CellRange(cell_range) for cell_range in merged])
+
+    def cells(row_values, row_styles):
+        row = []
+        for value, style in zip(row_values, row_styles):
+            if style:
+                value = WriteOnlyCell(sheet, value=value)
+                value._style = copy(styles[style])
+            row.append(value)
+        return row
+
+    sheet.append([])
+    sheet.append(cells(["業　　務　　報　　告　　書"], ["title"]))
+    sheet.append([])
+    sheet.append([])
+    sheet.append(cells([None] * 5 + [values.get("F5"), "年", values.get("H5"), "月度"],
+                       [None] * 5 + ["month"] * 4))
+    sheet.append(cells([None] * 5 + ["氏名", values.get("G6"), None, None],
+                       [None] * 5 + ["box"] * 4))
+    sheet.append(cells([None] * 5 + [None] * 4, [None] * 5 + ["box"] * 4))
+    sheet.append([])
+    sheet.append([])
+    sheet.append(cells(HEADERS, ["header"] * 9))
+    day_styles = ["date", "day", "time", "time", "day", "day", "yen", "note", "note"]
+    for row in range(FIRST_DAY_ROW, last_row + 1):
+        sheet.append(cells(day_row_values(row, values), day_styles))
+    sheet.append([])
+    sheet.append(cells([None] * 7 + ["勤務時間", "経　費"], [None] * 7 + ["box"] * 2))
+    sheet.append(cells([None] * 6 + ["合計", f"=SUM(F{FIRST_DAY_ROW}:F{last_row})",
+                                     f"=SUM(G{FIRST_DAY_ROW}:G{last_row})"],
+                       [None] * 6 + ["total", "sum", "sum_yen"]))
@@ -1,48 +1,248 @@
+import io
 import os
+import sys
+import time
 import argparse
-import pandas as pd
-from datetime import datetime
-from utils import read_csv, process_data, write_to_excel
+import multiprocessing
+from utils import (extract_employee_name, is_small_csv, process_data, process_rows, read_csv,
+                   read_csv_rows, split_by_month, write_annual_workbook, write_to_excel)
+from manifest import find_up_to_date_output, record_output
+import parse_cache
+from profiling import StageStats, collect, timed
 from config import (get_default_employee_name, get_input_dir, 
-                   get_output_dir)
+                   get_output_dir, get_template_path, get_workers, get_excel_writer)
 
-def process_attendance(csv_path, template_path, employee_name):
-    """勤怠データの処理を行う関数"""
+# process_attendanceの処理段階（読み込み・整形・書き込み・保存）
+STAGES = ("read", "process", "write", "save")
+
+class ConversionCancelled(Exception):
+    """変換が中止された"""
+
+def output_filename(year_month, employee_name):
+    """出力ファイル名（勤怠表_YYYYMM_氏名.xlsx）を作成する"""
+    return f"勤怠表_{year_month}_{employee_name}.xlsx"
+
+def annual_filename(months, employee_name):
+    """複数月をまとめた出力ファイル名（勤怠表_YYYYMM-YYYYMM_氏名.xlsx）を作成する"""
+    return f"勤怠表_{months[0][0]}-{months[-1][0]}_{employee_name}.xlsx"
+
+def prepare_attendance(csv_path, small, progress=None):
+    """
+    CSV（ファイルパスまたはバイナリのファイルオブジェクト）を読み込んで整形し、
+    (整形したデータ, 年月(YYYYMM)) を返す（smallの場合はpandasを使わずに読む）
+    pandasで読み込むCSVファイルは整形した結果をキャッシュし、次回はそれを読み込む
+    """
     # CSVデータを読み込み
-    df = read_csv(csv_path)
+    if progress:
+        progress("read")
+    cache_path = None
+    if not small:
+        with timed("cache"):
+            cache_path = parse_cache.cache_path_for(csv_path)
+            df = parse_cache.load(cache_path)
+        if df is not None:
+            if progress:
+                progress("process")
+            return df, df["日付"].min().strftime("%Y%m")
+    with timed("read_csv"):
+        if small:
+            rows = read_csv_rows(csv_path)
+            first_date = min(row.日付 for row in rows)
+        else:
+            df = read_csv(csv_path)
+            first_date = df["日付"].min().to_pydatetime()
+
+    # データの整形
+    if progress:
+        progress("process")
+    with timed("process_data"):
+        data = process_rows(rows) if small else process_data(df)
+    if cache_path is not None:
+        with timed("cache"):
+            parse_cache.store(cache_path, data)
 
     # CSVから月情報を取得
-    first_date = df["日付"].min()
-    year_month = first_date.to_pydatetime().strftime("%Y%m")
+    return data, first_date.strftime("%Y%m")
 
-    # データの整形
-    df_processed = process_data(df)
+def process_attendance(csv_path, template_path, employee_name, output_dir=None, progress=None,
+                       force=False, annual=False, on_data=None):
+    """勤怠データの処理を行う関数
+
+    progressを指定すると、各段階（STAGES）を始める前に段階名を渡して呼び出す
+    progressでConversionCancelledを投げると、その時点で処理を中止できる
+    前回の変換から入力（CSV・テンプレート・設定）が変わっていない場合は変換せずに
+    前回の出力パスを返す（forceを指定すると常に変換する）
+    annualを指定すると、CSVに含まれる月ごとの勤務表シートと年間集計シートを持つ
+    1つのExcelファイルを作成する
+    on_dataを指定すると、整形したデータを渡して呼び出す（一括処理の集計表に使う）
+    """
+    output_dir = output_dir or get_output_dir()
+    if not force:
+        with timed("manifest"):
+            output_path = find_up_to_date_output(csv_path, template_path, employee_name, output_dir,
+                                                 annual)
+        if output_path:
+            print(f"⏭ 変更がないためスキップしました: {output_path}")
+            return output_path
+
+    # CSVデータの読み込み・整形（小さいCSVはpandasを使わずに読む）
+    df_processed, year_month = prepare_attendance(csv_path, is_small_csv(csv_path), progress)
+    if on_data:
+        on_data(df_processed)
 
-    # 出力ファイル名を作成
-    output_filename = f"勤怠表_{year_month}_{employee_name}.xlsx"
-    output_path = os.path.join(get_output_dir(), output_filename)
+    if annual:
+        months = split_by_month(df_processed)
+        output_path = os.path.join(output_dir, annual_filename(months, employee_name))
+        if progress:
+            progress("write")
+            progress("save")
+        write_annual_workbook(template_path, output_path, months, csv_path)
+    else:
+        # 出力ファイル名を作成
+        output_path = os.path.join(output_dir, output_filename(year_month, employee_name))
 
-    # Excelに書き込み
-    write_to_excel(template_path, output_path, df_processed, csv_path)
+        # Excelに書き込み
+        if progress:
+            progress("write")
+        write_to_excel(template_path, output_path, df_processed, csv_path, progress=progress)
+    with timed("manifest"):
+        record_output(csv_path, template_path, employee_name, output_dir, output_path, annual)
 
     return output_path
 
+def convert_bytes(csv_data, template_path, employee_name, csv_filename=None, progress=None):
+    """CSVの内容をメモリ上で変換する関数（ファイルを読み書きしない）
+
+    csv_dataはCSVの内容（bytes）またはバイナリのファイルオブジェクト
+    (出力ファイル名, xlsxの内容のBytesIO) を返す
+    シートの従業員名は、csv_filename（元のCSVファイル名）から取得できればその名前、
+    できなければemployee_nameを使う
+    """
+    if not isinstance(csv_data, bytes):
+        csv_data = csv_data.read()
+
+    df_processed, year_month = prepare_attendance(
+        io.BytesIO(csv_data), is_small_csv(csv_data), progress
+    )
+
+    if progress:
+        progress("write")
+    sheet_employee_name = (extract_employee_name(csv_filename) if csv_filename else None) or employee_name
+    output = io.BytesIO()
+    write_to_excel(template_path, output, df_processed, csv_filename,
+                   employee_name=sheet_employee_name, progress=progress)
+    output.seek(0)
+    return output_filename(year_month, employee_name), output
+
 def main():
     """コマンドライン実行用のメイン関数"""
     # 必要なフォルダが存在しない場合は作成
     os.makedirs(get_input_dir(), exist_ok=True)
     os.makedirs(get_output_dir(), exist_ok=True)
 
+    # サブコマンド（watch・serveはmainを読み込むため、循環インポートを避けてここで読み込む）
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "watch":
+        from watch import main as watch_main
+        watch_main(sys.argv[2:])
+        return
+    if command == "serve":
+        from serve import main as serve_main
+        serve_main(sys.argv[2:])
+        return
+
     # コマンドライン引数の処理
-    parser = argparse.ArgumentParser(description="勤怠データをExcelに変換するツール")
+    parser = argparse.ArgumentParser(description="勤怠データをExcelに変換するツール",
+                                     epilog="入力フォルダの監視: python main.py watch --help / "
+                                            "HTTPサーバー: python main.py serve --help")
     parser.add_argument("--name", type=str, default=get_default_employee_name(), help="従業員名を指定")
-    parser.add_argument("--file", type=str, required=True, help="処理するCSVファイルのパス")
-    parser.add_argument("--template", type=str, required=True, help="テンプレートExcelファイルのパス")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", type=str, help="処理するCSVファイルのパス")
+    source.add_argument("--input-dir", type=str, nargs="?", const=get_input_dir(),
+                        help="フォルダ内のCSVファイルをまとめて処理（省略時はconfig.iniのinput_dir）")
+    source.add_argument("--consolidated", type=str,
+                        help="全従業員・複数月をまとめたCSVを従業員・月ごとに分けて処理")
+    parser.add_argument("--pattern", type=str, default=None,
+                        help="一括処理で対象とするCSVファイル名のパターン（例: 勤怠詳細_*_2025_03.csv）")
+    parser.add_argument("--chunksize", type=int, default=50000,
+                        help="まとめたCSVを一度に読み込む行数")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="一括処理の並列プロセス数（省略時はconfig.iniのworkers）")
+    parser.add_argument("--template", type=str, default=get_template_path(),
+                        help="テンプレートExcelファイルのパス（省略時はconfig.iniのtemplate_path。"
+                             "空文字の場合は組み込みのレイアウトで作成）")
+    parser.add_argument("--force", action="store_true",
+                        help="変更のないCSVも変換し直す（変換履歴を無視する）")
+    parser.add_argument("--bundle", type=str, default=None,
+                        help="一括処理の勤怠表を出力フォルダに保存せず、指定したZIPファイルにまとめる")
+    parser.add_argument("--no-summary", action="store_true",
+                        help="一括処理で全従業員の月ごとの合計をまとめた集計表（勤怠集計_*.xlsx）を作成しない")
+    parser.add_argument("--annual", action="store_true",
+                        help="従業員ごとに、月ごとの勤務表シートと年間集計シートを持つ1つのExcelファイルにまとめる")
+    parser.add_argument("--profile", action="store_true",
+                        help="処理段階（CSV読み込み・整形・テンプレート読み込み・保存など）ごとの時間を表示する")
+    parser.add_argument("--profile-json", type=str, default=None,
+                        help="処理段階ごとの時間を指定したJSONファイルに保存する")
     args = parser.parse_args()
+    if args.bundle and args.file:
+        parser.error("--bundleは--input-dirまたは--consolidatedと一緒に指定してください")
+    if args.bundle and args.annual:
+        parser.error("--bundleと--annualは同時に指定できません")
+    if args.template and not os.path.exists(args.template) and get_excel_writer() != "builtin":
+        parser.error(f"テンプレートファイルが見つかりません: {args.template}"
+                     "（組み込みのレイアウトで作成する場合は --template \"\" を指定してください）")
+
+    jobs = args.jobs if args.jobs is not None else get_workers()
+
+    start = time.perf_counter()
+    with collect() as timings:
+        results = run_command(args, jobs)
+    if results is None:
+        return
+
+    if args.profile or args.profile_json:
+        stats = StageStats.from_results(results, timings)
+        stats.report()
+        if args.profile_json:
+            stats.save_json(args.profile_json, time.perf_counter() - start)
+            print(f"✅ 処理時間をJSONに保存しました: {args.profile_json}")
+    if any(r["error"] for r in results):
+        raise SystemExit(1)
+
+def run_command(args, jobs):
+    """コマンドライン引数に合わせて変換し、結果のリストを返す（対象がない場合はNone）"""
+    # batchはmainを読み込むため、循環インポートを避けてここで読み込む
+    if args.consolidated:
+        from batch import convert_consolidated
+
+        return convert_consolidated(args.consolidated, args.template,
+                                    chunksize=args.chunksize, jobs=jobs, bundle=args.bundle,
+                                    annual=args.annual, summary=not args.no_summary)
+
+    if args.input_dir is not None:
+        from batch import CSV_PATTERN, find_csv_files, run_batch
+
+        csv_paths = find_csv_files(args.input_dir, args.pattern or CSV_PATTERN)
+        if not csv_paths:
+            print(f"❌ 処理対象のCSVファイルが見つかりません: {args.input_dir}")
+            return None
+        return run_batch(csv_paths, args.template, args.name, jobs=jobs, force=args.force,
+                         bundle=args.bundle, annual=args.annual, summary=not args.no_summary)
 
     # 処理実行
-    output_path = process_attendance(args.file, args.template, args.name)
-    print(f"✅ 勤怠表を作成しました: {output_path}")
+    from batch import convert_one
+
+    result = convert_one(args.file, args.template, args.name, get_output_dir(), force=args.force,
+                         annual=args.annual)
+    if result["skipped"]:
+        print(f"⏭ 変更がないためスキップしました: {result['output_path']}")
+    elif result["error"] is None:
+        print(f"✅ 勤怠表を作成しました: {result['output_path']}")
+    else:
+        print(f"❌ {result['error']}")
+    return [result]
 
 if __name__ == "__main__":
+    # PyInstallerでexe化した場合にプロセスプールを使うため
+    multiprocessing.freeze_support()
     main()
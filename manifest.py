@@ -0,0 +1,91 @@
+import os
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from config import VERSION, get_csv_encoding, get_date_format, get_excel_writer
+from utils import file_sha1, uses_builtin_layout
+
+# 出力フォルダに置く変換履歴（CSVごとに、変換に使った入力と出力ファイルを記録する）
+# 並列に変換するワーカープロセスから同時に書き込めるようSQLiteを使う
+MANIFEST_FILENAME = ".conversion_manifest.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    csv_path TEXT PRIMARY KEY,
+    csv_sha1 TEXT NOT NULL,
+    template_sha1 TEXT NOT NULL,
+    version TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    output_mtime_ns INTEGER NOT NULL,
+    output_size INTEGER NOT NULL,
+    converted_at TEXT NOT NULL
+)
+"""
+
+
+def connect(output_dir):
+    """出力フォルダの変換履歴を開く（ない場合は作成する）"""
+    conn = sqlite3.connect(os.path.join(output_dir, MANIFEST_FILENAME), timeout=30)
+    conn.execute(SCHEMA)
+    return conn
+
+
+def conversion_inputs(csv_path, template_path, employee_name, annual=False):
+    """
+    出力ファイルの内容を決める入力を返す
+    （CSV・テンプレートの内容、ツールのバージョン、従業員名と出力に影響する設定）
+    """
+    settings = {
+        "annual": annual,
+        "employee_name": employee_name,
+        "encoding": get_csv_encoding(),
+        "date_format": get_date_format(),
+        "writer": get_excel_writer(),
+    }
+    # 組み込みのレイアウトはツールのバージョンで決まる
+    template_sha1 = "builtin" if uses_builtin_layout(template_path) else file_sha1(template_path)
+    return (file_sha1(csv_path), template_sha1, VERSION,
+            json.dumps(settings, ensure_ascii=False, sort_keys=True))
+
+
+def find_up_to_date_output(csv_path, template_path, employee_name, output_dir, annual=False):
+    """
+    前回の変換から入力が変わっておらず、出力ファイルもそのまま残っていれば、その出力パスを返す
+    変換し直す必要がある場合はNoneを返す
+    """
+    if not os.path.exists(os.path.join(output_dir, MANIFEST_FILENAME)):
+        return None
+    with closing(connect(output_dir)) as conn:
+        row = conn.execute(
+            "SELECT csv_sha1, template_sha1, version, settings, output_path, output_mtime_ns, output_size"
+            " FROM conversions WHERE csv_path = ?",
+            (os.path.abspath(csv_path),)
+        ).fetchone()
+    if row is None:
+        return None
+    if tuple(row[:4]) != conversion_inputs(csv_path, template_path, employee_name, annual):
+        return None
+
+    output_path, mtime_ns, size = row[4:]
+    try:
+        stat = os.stat(output_path)
+    except OSError:
+        return None
+    # 出力ファイルが削除・編集されている場合は作り直す
+    if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+        return None
+    return output_path
+
+
+def record_output(csv_path, template_path, employee_name, output_dir, output_path, annual=False):
+    """変換した入力と出力ファイルを変換履歴に記録する"""
+    output_path = os.path.abspath(output_path)
+    stat = os.stat(output_path)
+    row = (os.path.abspath(csv_path),
+           *conversion_inputs(csv_path, template_path, employee_name, annual),
+           output_path, stat.st_mtime_ns, stat.st_size,
+           datetime.now().isoformat(timespec="seconds"))
+    with closing(connect(output_dir)) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
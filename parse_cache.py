@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+import tempfile
+from config import VERSION, get_cache_dir, get_cache_max_mb, get_csv_settings
+
+# pandasで読み込んで整形したCSV（process_dataの結果）をFeather形式で保存しておくキャッシュ
+# 同じCSVを別のテンプレートで変換し直す場合などに、CSVの解析を省いて型付きの列をそのまま読み込む
+# キャッシュのファイル名はCSVの内容・[CSV]の設定・ツールのバージョンから作るため、
+# どれかが変われば別のキャッシュになる。古いものは使われた順に削除して上限の大きさに収める
+
+CACHE_SUFFIX = ".feather"
+
+
+def cache_available():
+    """キャッシュを使えるか（max_mbが0以下、またはpyarrowがインストールされていない場合は使わない）"""
+    if get_cache_max_mb() <= 0:
+        return False
+    try:
+        import pyarrow.feather  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def cache_path_for(csv_path):
+    """
+    CSVファイルのキャッシュのパスを返す
+    キャッシュを使わない場合（ファイルオブジェクトを渡した場合を含む）はNone
+    """
+    if not isinstance(csv_path, (str, os.PathLike)) or not cache_available():
+        return None
+    digest = hashlib.sha1()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    digest.update(json.dumps([VERSION, get_csv_settings()], sort_keys=True).encode("utf-8"))
+    return os.path.join(get_cache_dir(), digest.hexdigest() + CACHE_SUFFIX)
+
+
+def load(cache_path):
+    """キャッシュがあれば整形済みのDataFrameを返す（ない・読めない場合はNone）"""
+    if cache_path is None or not os.path.exists(cache_path):
+        return None
+    import pandas as pd
+
+    try:
+        df = pd.read_feather(cache_path)
+    except Exception:
+        return None  # 書き込み途中で削除された・壊れている場合は読み込み直す
+    try:
+        # 最近使ったキャッシュとして更新日時を新しくする（古いものから削除するため）
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return df
+
+
+def store(cache_path, df):
+    """
+    整形済みのDataFrameをキャッシュに保存し、上限を超えた分を古いものから削除する
+    並列に変換するワーカープロセスが同時に書き込んでも壊れないよう、一時ファイルから置き換える
+    """
+    if cache_path is None:
+        return
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            df.reset_index(drop=True).to_feather(f)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    evict(cache_dir, get_cache_max_mb() * 1024 * 1024)
+
+
+def evict(cache_dir, max_bytes):
+    """キャッシュの合計がmax_bytesを超えていれば、更新日時が古い（最近使われていない）ものから削除する"""
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(CACHE_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # 別のプロセスが先に削除した
+        total -= size
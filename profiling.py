@@ -0,0 +1,123 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import VERSION
+
+# 計測する処理段階と表示名（表示順）
+TIMED_STAGES = {
+    "manifest": "変換履歴の確認",
+    "cache": "キャッシュ",
+    "read_csv": "CSV読み込み",
+    "process_data": "データ整形",
+    "build_values": "書き込む値の作成",
+    "load_template": "テンプレート読み込み",
+    "save": "保存",
+    "summary": "集計表の作成",
+}
+
+# collectで計測中の {段階名: [回数, 合計秒, 最大秒]}（計測していない場合はNone）
+# ワーカープロセスでは1件ずつ処理するため、プロセスごとに1つだけ持つ
+_timings = None
+
+
+@contextmanager
+def timed(stage):
+    """withの中の処理時間をstageとして記録する（collectの外では何もしない）"""
+    if _timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(_timings, stage, time.perf_counter() - start)
+
+
+@contextmanager
+def collect():
+    """
+    withの中でtimedが計測した時間を集計し、{段階名: [回数, 合計秒, 最大秒]} として渡す
+    入れ子にした場合、内側で計測した時間は外側には含めない
+    """
+    global _timings
+    previous = _timings
+    _timings = timings = {}
+    try:
+        yield timings
+    finally:
+        _timings = previous
+
+
+def add_timing(timings, stage, elapsed):
+    """集計に1回分の時間を加える"""
+    entry = timings.setdefault(stage, [0, 0.0, 0.0])
+    entry[0] += 1
+    entry[1] += elapsed
+    entry[2] = max(entry[2], elapsed)
+
+
+class StageStats:
+    """
+    一括処理全体の処理段階ごとの時間を集計する
+    ファイルごとの集計（変換結果のtimings）をaddで加えていく
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.files = 0
+
+    def add(self, timings, file=True):
+        """集計を加える（fileがFalseの場合はファイル数に数えない）"""
+        if not timings:
+            return
+        self.files += file
+        for stage, (count, total, longest) in timings.items():
+            entry = self.timings.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += total
+            entry[2] = max(entry[2], longest)
+
+    @classmethod
+    def from_results(cls, results, timings=None):
+        """変換結果のリスト（と呼び出し元のプロセスで計測した時間）から集計する"""
+        stats = cls()
+        for result in results:
+            stats.add(result.get("timings"))
+        stats.add(timings, file=False)
+        return stats
+
+    def rows(self):
+        """表示順の (段階名, 表示名, 回数, 合計秒, 平均秒, 最大秒)"""
+        stages = [stage for stage in TIMED_STAGES if stage in self.timings]
+        stages += sorted(stage for stage in self.timings if stage not in TIMED_STAGES)
+        for stage in stages:
+            count, total, longest = self.timings[stage]
+            yield stage, TIMED_STAGES.get(stage, stage), count, total, total / count, longest
+
+    def report(self):
+        """処理段階ごとの時間を表で表示する"""
+        grand_total = sum(total for _, total, _ in self.timings.values())
+        print(f"処理段階ごとの時間（{self.files}件）")
+        for _, label, count, total, mean, longest in self.rows():
+            share = total / grand_total * 100 if grand_total > 0 else 0.0
+            print(f"  {label:<12} {count:6d}回  合計 {total:8.3f}秒 ({share:5.1f}%)"
+                  f"  平均 {mean * 1000:8.2f} ms  最大 {longest * 1000:8.2f} ms")
+
+    def to_dict(self, elapsed=None):
+        return {
+            "version": VERSION,
+            "measured_at": datetime.now().isoformat(timespec="seconds"),
+            "files": self.files,
+            "elapsed_s": round(elapsed, 4) if elapsed is not None else None,
+            "stages": {
+                stage: {"count": count, "total_s": round(total, 4),
+                        "mean_ms": round(mean * 1000, 3), "max_ms": round(longest * 1000, 3)}
+                for stage, _, count, total, mean, longest in self.rows()
+            },
+        }
+
+    def save_json(self, path, elapsed=None):
+        """集計結果をJSONで保存する（リリース間の比較用）"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(elapsed), f, ensure_ascii=False, indent=2)
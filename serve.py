@@ -0,0 +1,246 @@
+import os
+import glob
+import json
+import time
+import signal
+import argparse
+import threading
+import collections
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+from config import get_default_employee_name, get_template_path, get_workers
+from main import convert_bytes
+from utils import warm_up_imports, warm_up_template
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# 受け付けるCSVの最大サイズ
+MAX_CSV_BYTES = 50 * 1024 * 1024
+# 組み込みのレイアウト（テンプレートなし）のテンプレートID
+BUILTIN_TEMPLATE_ID = "builtin"
+
+
+def find_templates(template_path=None):
+    """
+    テンプレートのフォルダにあるExcelファイルを {テンプレートID: パス} で返す
+    テンプレートIDは拡張子を除いたファイル名（組み込みのレイアウトはbuiltin）
+    """
+    template_path = template_path or get_template_path()
+    paths = glob.glob(os.path.join(os.path.dirname(template_path) or ".", "*.xlsx"))
+    if os.path.exists(template_path):
+        paths.append(template_path)
+    templates = {os.path.splitext(os.path.basename(path))[0]: path for path in sorted(paths)}
+    templates.setdefault(BUILTIN_TEMPLATE_ID, "")
+    return templates
+
+
+def warm_up_worker(template_paths):
+    """ワーカープロセスの起動時に重いモジュールを読み込み、テンプレートを解析しておく"""
+    # Ctrl+Cはサーバーのプロセスだけで受け取り、ワーカーは終了処理に任せる
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    warm_up_imports()
+    for template_path in template_paths:
+        warm_up_template(template_path)
+
+
+def start_executor(jobs, template_paths):
+    """
+    変換用のプロセスプールを起動し、すべてのワーカープロセスの準備が済むまで待つ
+    spawn（Windows）ではタスクを渡したときに空いているワーカーがなければ1つずつ起動するため、
+    ワーカー数と同じ数のタスクを渡してすべて起動させる
+    """
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=warm_up_worker,
+                                   initargs=(template_paths,))
+    wait([executor.submit(warm_up_imports) for _ in range(jobs)])
+    return executor
+
+
+def restart_executor(server, broken):
+    """
+    異常終了したワーカープロセスがあり使えなくなったプロセスプールを起動し直す
+    同時に失敗した複数のリクエストから呼ばれても、起動し直すのは1回だけにする
+    """
+    with server.executor_lock:
+        if server.executor is not broken:
+            return
+        print("⚠️ ワーカープロセスが異常終了したため、起動し直します")
+        broken.shutdown(wait=False, cancel_futures=True)
+        server.executor = start_executor(server.jobs, list(server.templates.values()))
+
+
+def convert_csv_bytes(csv_bytes, template_path, employee_name, filename=None):
+    """
+    CSVの内容を変換し、(出力ファイル名, xlsxの内容) を返す（ワーカープロセスで呼ばれる）
+    シートの従業員名はfilename（元のCSVファイル名）から取得し、取得できなければemployee_nameを使う
+    """
+    output_name, output = convert_bytes(csv_bytes, template_path, employee_name,
+                                        csv_filename=filename)
+    return output_name, output.getvalue()
+
+
+class LatencyStats:
+    """リクエストの処理時間を記録し、パーセンタイルを計算する（スレッドセーフ）"""
+
+    def __init__(self, size=10000):
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=size)  # 直近size件
+        self.requests = 0
+        self.errors = 0
+
+    def add(self, elapsed, error=False):
+        with self.lock:
+            self.latencies.append(elapsed)
+            self.requests += 1
+            self.errors += error
+
+    def summary(self):
+        """件数と直近の処理時間のパーセンタイル（ミリ秒）"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            summary = {"requests": self.requests, "errors": self.errors}
+        for p in (50, 90, 99):
+            value = latencies[min(len(latencies) - 1, len(latencies) * p // 100)] if latencies else None
+            summary[f"p{p}_ms"] = round(value * 1000, 1) if value is not None else None
+        return summary
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """
+    POST /convert?name=従業員名&template=テンプレートID&filename=CSVファイル名  本文: CSVの内容 → xlsx
+    GET /templates  使えるテンプレートID
+    GET /stats      リクエスト数と処理時間のパーセンタイル
+    """
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/templates":
+            self.send_json(200, {"templates": sorted(self.server.templates),
+                                 "default": self.server.default_template})
+        elif path == "/stats":
+            self.send_json(200, self.server.stats.summary())
+        else:
+            self.send_json(404, {"error": f"見つかりません: {path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        if url.path != "/convert":
+            self.send_json(404, {"error": f"見つかりません: {url.path}"})
+            return
+
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        name = query.get("name") or get_default_employee_name()
+        template_id = query.get("template") or self.server.default_template
+        template_path = self.server.templates.get(template_id)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = None
+        if length is None:
+            status, body = 400, {"error": "Content-Lengthが不正です"}
+        elif template_path is None:
+            status, body = 404, {"error": f"テンプレートがありません: {template_id}"}
+        elif length <= 0:
+            status, body = 400, {"error": "CSVの内容を送信してください"}
+        elif length > MAX_CSV_BYTES:
+            status, body = 413, {"error": f"CSVが大きすぎます（上限{MAX_CSV_BYTES}バイト）"}
+        else:
+            csv_bytes = self.rfile.read(length)
+            executor = self.server.executor
+            try:
+                filename, xlsx = executor.submit(
+                    convert_csv_bytes, csv_bytes, template_path, name, query.get("filename")
+                ).result()
+            except BrokenProcessPool as e:
+                # 変換中にワーカープロセスが異常終了した（メモリ不足など）。次のリクエストに備えて起動し直す
+                restart_executor(self.server, executor)
+                status, body = 503, {"error": f"{type(e).__name__}: {e}"}
+            except (ValueError, KeyError) as e:
+                # CSVの内容・形式の誤り（UnicodeDecodeErrorもValueErrorに含まれる）
+                status, body = 400, {"error": f"{type(e).__name__}: {e}"}
+            except Exception as e:
+                status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+            else:
+                self.send_response(200)
+                self.send_header("Content-Type", XLSX_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(xlsx)))
+                self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(filename)}")
+                self.end_headers()
+                self.wfile.write(xlsx)
+                self.server.stats.add(time.perf_counter() - start)
+                return
+
+        self.send_json(status, body)
+        self.server.stats.add(time.perf_counter() - start, error=True)
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def serve(host="127.0.0.1", port=8765, jobs=None, template_path=None, quiet=False):
+    """
+    変換用のHTTPサーバーを起動する（Ctrl+Cで終了）
+    リクエストはスレッドで並行に受け付け、変換は起動済みのワーカープロセスで行う
+    """
+    templates = find_templates(template_path)
+    default_path = template_path or get_template_path()
+    default_template = os.path.splitext(os.path.basename(default_path))[0]
+    if default_template not in templates:
+        if default_path:
+            print(f"⚠️ テンプレートファイルが見つかりません: {default_path}"
+                  f"（テンプレートIDを指定しない場合は組み込みのレイアウト{BUILTIN_TEMPLATE_ID}で作成します）")
+        default_template = BUILTIN_TEMPLATE_ID
+
+    jobs = jobs or get_workers()
+    # 最初のリクエストを待たずにワーカープロセスを起動し、準備を済ませておく
+    executor = start_executor(jobs, list(templates.values()))
+
+    server = ThreadingHTTPServer((host, port), ConversionHandler)
+    server.daemon_threads = True
+    server.executor = executor
+    server.executor_lock = threading.Lock()
+    server.jobs = jobs
+    server.templates = templates
+    server.default_template = default_template
+    server.stats = LatencyStats()
+    server.quiet = quiet
+    print(f"🚀 http://{host}:{server.server_port}/ で待ち受けています"
+          f"（ワーカー {jobs}、テンプレート {', '.join(templates)}、Ctrl+Cで終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.executor.shutdown(cancel_futures=True)
+        stats = server.stats.summary()
+        print(f"終了しました（リクエスト {stats['requests']}件 / エラー {stats['errors']}件 / "
+              f"p50 {stats['p50_ms']} ms / p90 {stats['p90_ms']} ms / p99 {stats['p99_ms']} ms）")
+
+
+def main(argv=None):
+    """python main.py serve のコマンドライン引数を処理する"""
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="CSVを受け取って勤怠表のxlsxを返すHTTPサーバーを起動する"
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=8765, help="待ち受けるポート番号")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="ワーカープロセス数（省略時はconfig.iniのworkers）")
+    parser.add_argument("--template", type=str, default=None,
+                        help="既定のテンプレート（同じフォルダのxlsxもテンプレートIDで指定できる）")
+    parser.add_argument("--quiet", action="store_true", help="リクエストごとのログを表示しない")
+    args = parser.parse_args(argv)
+
+    serve(args.host, args.port, args.jobs, args.template, args.quiet)
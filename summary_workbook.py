@@ -0,0 +1,100 @@
+import os
+from utils import DURATION_COLUMNS
+
+# 一括処理で変換した全従業員の月ごとの合計を1つのシートにまとめた集計表
+SUMMARY_SHEET_NAME = "勤怠集計"
+SUMMARY_KEYS = ["従業員名", "年月"]
+
+
+def summary_filename(table):
+    """集計表のファイル名（勤怠集計_YYYYMM-YYYYMM.xlsx）"""
+    year_months = table.index.get_level_values("年月")
+    return f"勤怠集計_{year_months.min()}-{year_months.max()}.xlsx"
+
+
+def summary_records(data, employee_name):
+    """
+    整形したデータ（process_dataのDataFrameまたはprocess_rowsのリスト）から、
+    集計に使う列だけを {列名: 値のリスト} で返す（ワーカープロセスから受け渡すため小さくする）
+    """
+    if isinstance(data, list):
+        records = {
+            "年月": [row.日付.strftime("%Y%m") for row in data],
+            "勤怠種別": [row.勤怠種別 for row in data],
+        }
+        for column in DURATION_COLUMNS:
+            records[column] = [getattr(row, column) for row in data]
+    else:
+        records = {"年月": data["日付"].dt.strftime("%Y%m").tolist(),
+                   "勤怠種別": data["勤怠種別"].tolist()}
+        for column in DURATION_COLUMNS:
+            records[column] = data[column].tolist()
+    records["従業員名"] = [employee_name] * len(records["年月"])
+    return records
+
+
+def merge_records(records_list):
+    """複数のsummary_recordsを1つにつなげる（月ごとに分けたデータをまとめる場合）"""
+    merged = {}
+    for records in records_list:
+        for column, values in records.items():
+            merged.setdefault(column, []).extend(values)
+    return merged
+
+
+def aggregate(results):
+    """
+    変換結果のsummary（summary_records）を全件まとめ、1回のgroupbyで従業員・年月ごとに集計する
+    出勤日数・時間の列（DURATION_COLUMNS）の合計と、勤怠種別ごとの日数を持つDataFrameを返す
+    集計するデータがない場合はNone
+    """
+    import pandas as pd
+
+    frames = [pd.DataFrame(result["summary"]) for result in results if result.get("summary")]
+    if not frames:
+        return None
+    frame = pd.concat(frames, ignore_index=True)
+    # 勤怠種別ごとの日数は種別の列（0/1）を合計して求め、すべての列を同じgroupbyで集計する
+    kinds = pd.get_dummies(frame["勤怠種別"].fillna("（空欄）"), dtype="int64")
+    kinds = kinds[kinds.sum().sort_values(ascending=False, kind="stable").index]  # 多い種別から
+    kinds.columns = [f"{kind}（日）" for kind in kinds.columns]
+    table = pd.concat([
+        frame[SUMMARY_KEYS],
+        (frame["総勤務時間"] > 0).astype("int64").rename("出勤日数"),
+        frame[DURATION_COLUMNS],
+        kinds,
+    ], axis=1).groupby(SUMMARY_KEYS, sort=True).sum()
+    table[DURATION_COLUMNS] = table[DURATION_COLUMNS].round(2)
+    return table
+
+
+def write_summary_workbook(output_path, table):
+    """
+    集計結果を1つのシートに書き出す（openpyxlのwrite_onlyモード）
+    最後の行に列ごとの合計（数式）を入れる
+    output_pathはファイルパスまたはバイナリのファイルオブジェクト
+    """
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet(SUMMARY_SHEET_NAME)
+    header = SUMMARY_KEYS + list(table.columns)
+    last_row = len(table) + 1
+    sheet.freeze_panes = "C2"
+    sheet.auto_filter.ref = f"A1:{get_column_letter(len(header))}{last_row}"
+    sheet.column_dimensions["A"].width = 16
+    for index in range(2, len(header) + 1):
+        sheet.column_dimensions[get_column_letter(index)].width = 12
+
+    sheet.append(header)
+    for (employee_name, year_month), row in zip(table.index, table.itertuples(index=False)):
+        sheet.append([employee_name, year_month, *row])
+    sheet.append(["合計", None] + [
+        f"=SUM({get_column_letter(index)}2:{get_column_letter(index)}{last_row})"
+        for index in range(3, len(header) + 1)
+    ])
+    wb.save(output_path)
+
+    if isinstance(output_path, (str, os.PathLike)):
+        print(f"📊 集計表を保存しました: {output_path}（{len(table)}行）")
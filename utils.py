@@ -1,13 +1,37 @@
+import io
 import os
 import sys
-import pandas as pd
-import openpyxl
+import csv
 import subprocess
 import platform
 import shutil
+import pickle
+import hashlib
+from datetime import datetime
 from pathlib import Path
-from openpyxl.utils import get_column_letter
-from config import get_csv_encoding, get_date_format, get_input_dir, get_output_dir
+from config import (get_csv_encoding, get_csv_engine, get_date_format, get_input_dir,
+                    get_output_dir, get_excel_writer, get_fast_path_kb)
+from profiling import timed
+
+# pandas・numpy・openpyxlは読み込みに時間がかかるため、使う関数の中で読み込む
+# （GUIの起動時には読み込まず、画面を表示した後にwarm_up_importsで読み込む）
+
+def warm_up_imports(template_path=None):
+    """
+    変換で使う重いモジュールを先に読み込んでおく
+    小さなCSVはpandasを使わずに読み込むため、pandas・numpyは[CSV] fast_path_kbが0以下
+    （常にpandasで読み込む）の場合だけ読み込む
+    template_pathを指定するとテンプレートも解析しておく（失敗した場合は変換時にエラーにする）
+    """
+    import openpyxl  # noqa: F401
+    if get_fast_path_kb() <= 0:
+        import numpy  # noqa: F401
+        import pandas  # noqa: F401
+    if template_path is not None:
+        try:
+            warm_up_template(template_path)
+        except Exception:
+            pass
 
 def setup_directories():
     """
@@ -38,11 +62,9 @@ def setup_directories():
                 os.makedirs(template_path.parent, exist_ok=True)
                 shutil.copy2(str(bundled_template), str(template_path))
             else:
-                # テンプレートが見つからない場合は空のテンプレートを作成
-                wb = openpyxl.Workbook()
-                sheet = wb.active
-                sheet.title = "勤務表"
-                wb.save(template_path)
+                # テンプレートが見つからない場合は組み込みのレイアウトでひな型を作成
+                from layout_writer import write_builtin_sheet
+                write_builtin_sheet(template_path, {})
 
 
 def open_folder(path):
@@ -64,14 +86,189 @@ def open_folder(path):
         return False
 
 
-def read_csv(csv_path):
+def extract_employee_name(csv_filename):
+    """
+    CSVファイル名（勤怠詳細_氏名_YYYY_MM.csv）から従業員名を取り出す
+    一致しない場合はNoneを返す
+    """
+    import re
+    name_match = re.search(r'勤怠詳細_(.+?)_\d{4}_\d{2}', os.path.basename(csv_filename))
+    return name_match.group(1) if name_match else None
+
+
+def csv_read_encoding():
+    """
+    CSV読み込み時の文字コード
+    freeeのCSVはBOM付きのため、UTF-8の場合はBOMを取り除くutf-8-sigで読む
+    """
+    encoding = get_csv_encoding()
+    if encoding.lower().replace("_", "-") in ("utf-8", "utf8"):
+        return "utf-8-sig"
+    return encoding
+
+# process_dataで使う列
+CSV_COLUMNS = ["日付", "始業時刻", "終業時刻", "総勤務時間", "法定内残業", "時間外労働", "深夜労働", "勤怠種別"]
+# まとめたCSVを従業員ごとに分けるときに追加で読む列
+GROUP_COLUMNS = ["氏名", "従業員番号"]
+# 読み込み時の型（型推論をさせない）
+CSV_DTYPES = {
+    "氏名": str,
+    "従業員番号": "Int64",
+    "日付": str,
+    "曜日": "category",
+    "始業時刻": str,
+    "終業時刻": str,
+    "総勤務時間": str,
+    "法定内残業": str,
+    "時間外労働": str,
+    "深夜労働": str,
+    "勤怠種別": "category",
+}
+
+def csv_engine():
+    """
+    CSVの読み込みエンジン（config.iniの[CSV] engine）
+    pyarrowが指定されていてもインストールされていない場合はcを使う
+    """
+    engine = get_csv_engine()
+    if engine not in ("c", "python", "pyarrow"):
+        raise ValueError(f"config.iniのengineの値が不正です: {engine}")
+    if engine == "pyarrow":
+        try:
+            import pyarrow.csv  # noqa: F401
+        except ImportError:
+            return "c"
+    return engine
+
+def read_csv_options(columns):
+    """pd.read_csvに渡す共通の引数（読み込む列と型）"""
+    return {
+        "encoding": csv_read_encoding(),
+        "usecols": columns,
+        "dtype": {column: CSV_DTYPES[column] for column in columns if column in CSV_DTYPES},
+    }
+
+def read_csv_pyarrow(csv_path, columns):
+    """
+    pyarrowのマルチスレッドのCSVリーダーで読み込む
+    pd.read_csv(engine="pyarrow")は「09:00」を時刻と推論して「09:00:00」に変えてしまうため、
+    pyarrowを直接使って全列を文字列として読み、cエンジンと同じ型に揃える
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    encoding = csv_read_encoding()
+    table = pa_csv.read_csv(
+        csv_path,
+        # pyarrowはUTF-8のBOMを自動で読み飛ばす
+        read_options=pa_csv.ReadOptions(encoding="utf8" if encoding == "utf-8-sig" else encoding),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pa.string() for column in columns},
+            strings_can_be_null=True,
+        ),
+    )
+    dtypes = read_csv_options(columns)["dtype"]
+    return table.to_pandas().astype({column: dtype for column, dtype in dtypes.items() if dtype is not str})
+
+def parse_dates(series):
+    """日付の列をconfig.iniのdate_formatで変換する（書式の推測はしない）"""
+    import pandas as pd
+    return pd.to_datetime(series, format=get_date_format())
+
+def read_csv(csv_path, columns=CSV_COLUMNS):
     """
     CSVファイルを読み込み、DataFrameとして返す
+    csv_pathはファイルパスまたはバイナリのファイルオブジェクト
+    読み込むのは必要な列（既定ではprocess_dataで使う列）だけ
     """
-    df = pd.read_csv(csv_path, encoding=get_csv_encoding())
-    df["日付"] = pd.to_datetime(df["日付"], format=get_date_format())
+    import pandas as pd
+
+    engine = csv_engine()
+    if engine == "pyarrow":
+        df = read_csv_pyarrow(csv_path, columns)
+    else:
+        df = pd.read_csv(csv_path, engine=engine, **read_csv_options(columns))
+    df["日付"] = parse_dates(df["日付"])
     return df
 
+def iter_csv_groups(csv_path, chunksize=50000):
+    """
+    全従業員・複数月をまとめたCSVを少しずつ読み込み、
+    従業員番号・年月ごとのDataFrameを (従業員番号, 氏名, 年月(YYYYMM), DataFrame) で返す
+    freeeの出力と同じく、同じ従業員・年月の行が連続して並んでいる必要がある
+    （1つのチャンクに収まる範囲の並び順の違いは、従業員番号・年月順と日付順に並べ直す）
+    """
+    import pandas as pd
+
+    pending = {}   # 読み込み途中のグループ {(従業員番号, 年月): [DataFrame, ...]}
+    finished = set()
+
+    def flush(key):
+        finished.add(key)
+        group = pd.concat(pending.pop(key), ignore_index=True)
+        # build_sheet_valuesは行の位置で日付の行を決めるため、日付順にする
+        if not group["日付"].is_monotonic_increasing:
+            group = group.sort_values("日付", kind="stable", ignore_index=True)
+        employee_id, year_month = key
+        return employee_id, group["氏名"].iloc[0], year_month, group
+
+    # pyarrowエンジンは分割読み込みに対応していないため、その場合はcエンジンを使う
+    engine = "python" if csv_engine() == "python" else "c"
+    reader = pd.read_csv(csv_path, chunksize=chunksize, engine=engine,
+                         **read_csv_options(CSV_COLUMNS + GROUP_COLUMNS))
+    chunk = next(reader, None)
+    while chunk is not None:
+        chunk["日付"] = parse_dates(chunk["日付"])
+        # 従業員番号・日付が空の行は分けられない（除いて変換すると日付の行がずれる）
+        for column in ("従業員番号", "日付"):
+            missing = chunk[column].isna()
+            if missing.any():
+                # チャンクの行番号はファイル全体の通し番号（見出しが1行目）
+                raise ValueError(f"CSVの{chunk.index[missing][0] + 2}行目の{column}が空です")
+        year_month = chunk["日付"].dt.strftime("%Y%m")
+        # チャンク内は1回のgroupbyで従業員番号・年月ごとに分ける
+        for key, group in chunk.groupby([chunk["従業員番号"], year_month], sort=False, dropna=False):
+            if key in finished:
+                raise ValueError(
+                    f"CSVが従業員・月の順に並んでいません（従業員番号{key[0]} {key[1]}が離れた位置にあります）。"
+                    "従業員番号・日付の順に並べ替えてから実行してください"
+                )
+            pending.setdefault(key, []).append(group)
+
+        # チャンク末尾のグループ以外は読み終わっている（最後のチャンクの場合はすべて）
+        last_key = (chunk["従業員番号"].iloc[-1], year_month.iloc[-1])
+        chunk = next(reader, None)
+        ready = [key for key in pending if chunk is None or key != last_key]
+        # 従業員ごとに月が続くよう、従業員番号・年月順に返す
+        for key in sorted(ready):
+            yield flush(key)
+
+# HH:MM形式の時間を小数時間に変換する列
+DURATION_COLUMNS = ["総勤務時間", "法定内残業", "時間外労働", "深夜労働"]
+
+def time_to_hours(time_str):
+    """
+    HH:MM形式の文字列を小数時間に変換する（空欄は0、24時間以上も可）
+    """
+    if isinstance(time_str, str) and ":" in time_str:
+        h, m = map(int, time_str.split(":"))
+        return h + m / 60  # 分を時間に変換
+    return 0.0
+
+def hhmm_to_hours(series):
+    """
+    HH:MM形式の列をまとめて小数時間に変換する
+    時間の値の種類は少ないため、重複を除いた値だけを変換して各行に割り当てる
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series)
+    # 末尾の0は欠損値（コード-1）用
+    table = np.array([time_to_hours(value) for value in uniques] + [0.0])
+    return pd.Series(table[codes], index=series.index, name=series.name)
+
 def process_data(df):
     """
     勤怠データを整形する
@@ -85,43 +282,350 @@ def process_data(df):
     # df_filtered = df_filtered[~df_filtered["勤怠種別"].isin(["未入力", "所定休日", "法定休日"])]
     
     # 時間を小数時間に変換
-    def time_to_hours(time_str):
-        if isinstance(time_str, str) and ":" in time_str:
-            h, m = map(int, time_str.split(":"))
-            return h + m / 60  # 分を時間に変換
-        return 0
-
-    df_filtered["総勤務時間"] = df_filtered["総勤務時間"].apply(time_to_hours)
+    for column in DURATION_COLUMNS:
+        df_filtered[column] = hhmm_to_hours(df_filtered[column])
     
     return df_filtered
 
-def write_to_excel(template_path, output_path, df, csv_filename):
+class AttendanceRow:
     """
-    ひな型Excelに勤怠データを書き込む
+    1日分の勤怠データ（pandasを使わずに読み込んだ行）
+    属性名はCSV_COLUMNSと同じで、DataFrame.itertuples()の行と同じように扱える
+    """
+    __slots__ = tuple(CSV_COLUMNS)
+
+    def __init__(self, values):
+        for column, value in zip(self.__slots__, values):
+            setattr(self, column, value)
+
+    def values(self):
+        """CSV_COLUMNSの順の値のリスト"""
+        return [getattr(self, column) for column in self.__slots__]
+
+def is_small_csv(csv_path):
+    """
+    pandasを使わずに読み込むCSVか（config.iniの[CSV] fast_path_kb以下の大きさ）
+    csv_pathはファイルパスまたはCSVの内容（bytes）
+    1人・1か月分（約31行）のCSVではpandasの読み込みの方が実際の処理より時間がかかる
+    """
+    limit = get_fast_path_kb() * 1024
+    size = len(csv_path) if isinstance(csv_path, bytes) else os.path.getsize(csv_path)
+    return limit > 0 and size <= limit
+
+def open_csv_text(csv_path):
+    """
+    CSVをconfig.iniの文字コードのテキストとして開く
+    csv_pathはファイルパスまたはバイナリのファイルオブジェクト（閉じると元のファイルも閉じる）
+    """
+    if isinstance(csv_path, (str, os.PathLike)):
+        return open(csv_path, encoding=csv_read_encoding(), newline="")
+    return io.TextIOWrapper(csv_path, encoding=csv_read_encoding(), newline="")
+
+def read_csv_rows(csv_path):
+    """
+    標準ライブラリのcsvモジュールでCSVを読み込み、AttendanceRowのリストを返す
+    csv_pathはファイルパスまたはバイナリのファイルオブジェクト
+    読み込むのはCSV_COLUMNSの列だけで、空欄はNone、日付はdatetimeにする
+    """
+    date_format = get_date_format()
+    rows = []
+    with open_csv_text(csv_path) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [column for column in CSV_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"CSVに必要な列がありません: {', '.join(missing)}")
+        indexes = [header.index(column) for column in CSV_COLUMNS]
+        for record in reader:
+            if not record:
+                continue  # 空行は読み飛ばす（pd.read_csvと同じ）
+            record += [""] * (len(header) - len(record))
+            values = [record[index] or None for index in indexes]
+            values[0] = datetime.strptime(values[0], date_format)
+            rows.append(AttendanceRow(values))
+    return rows
+
+def process_rows(rows):
+    """
+    read_csv_rowsで読み込んだ行をprocess_dataと同じように整形し、新しいリストで返す
+    """
+    hours = {}  # 時間の値の種類は少ないため、変換結果を使い回す
+    processed = []
+    for row in rows:
+        values = row.values()
+        for index, column in enumerate(CSV_COLUMNS):
+            if column in DURATION_COLUMNS:
+                value = values[index]
+                if value not in hours:
+                    hours[value] = time_to_hours(value)
+                values[index] = hours[value]
+        processed.append(AttendanceRow(values))
+    return processed
+
+def attendance_totals(df):
+    """
+    整形したデータ（process_dataのDataFrameまたはprocess_rowsのリスト）の
+    年月・出勤日数・時間の列（DURATION_COLUMNS）の合計を返す
+    """
+    rows = df if isinstance(df, list) else list(df.itertuples())
+    totals = {
+        "年月": rows[0].日付.strftime("%Y%m"),
+        "出勤日数": sum(1 for row in rows if row.総勤務時間 > 0),
+    }
+    for column in DURATION_COLUMNS:
+        totals[column] = round(float(sum(getattr(row, column) for row in rows)), 2)
+    return totals
+
+def file_sha1(path):
+    """ファイルの内容のSHA-1（16進数）"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def cached_file_value(cache, path, build):
+    """
+    ファイルから作った値をキャッシュする
+    更新日時・サイズが同じならそのまま、変わっていても内容のSHA-1が同じなら
+    キャッシュを返し、内容が変わった場合のみbuild(path)で作り直す
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    cached = cache.get(key)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[3]
+
+    digest = file_sha1(key)
+    if cached and cached[2] == digest:
+        # 内容は同じ（コピーやタイムスタンプのみの変更）
+        cache[key] = (stat.st_mtime_ns, stat.st_size, digest, cached[3])
+        return cached[3]
+
+    value = build(key)
+    cache[key] = (stat.st_mtime_ns, stat.st_size, digest, value)
+    return value
+
+# 解析済みテンプレートのキャッシュ
+# {絶対パス: (更新日時, サイズ, SHA-1, pickle化したWorkbook)}
+_template_cache = {}
+
+def load_template(template_path):
+    """
+    テンプレートExcelを読み込む
+    一度解析したテンプレートはpickle化して保持し、2回目以降はその複製を返す
     """
     import openpyxl
-    wb = openpyxl.load_workbook(template_path)
-    sheet = wb["勤務表"]
 
-    # G6セルにCSVファイル名から取得した従業員名を記載
-    import re
-    name_match = re.search(r'勤怠詳細_(.+?)_\d{4}_\d{2}', os.path.basename(csv_filename))
-    employee_name = name_match.group(1) if name_match else "不明"
-    sheet["G6"] = employee_name
+    data = cached_file_value(
+        _template_cache, template_path,
+        lambda path: pickle.dumps(openpyxl.load_workbook(path))
+    )
+    return pickle.loads(data)
+
+def uses_builtin_layout(template_path):
+    """
+    テンプレートを使わず組み込みのレイアウト（layout_writer）で書き出すかどうか
+    config.iniのwriterがbuiltinの場合と、テンプレートが指定されていない（空欄の）場合
+    指定されたテンプレートが存在しない場合は、気づかずに別のレイアウトで作成しないようエラーにする
+    """
+    if get_excel_writer() == "builtin" or not template_path:
+        return True
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"テンプレートファイルが見つかりません: {template_path}")
+    return False
+
+def warm_up_template(template_path):
+    """
+    config.iniのwriterに合わせてテンプレートを解析し、キャッシュしておく
+    """
+    if uses_builtin_layout(template_path):
+        import layout_writer  # noqa: F401  解析するテンプレートはない
+    elif get_excel_writer() == "xml":
+        from xlsx_writer import load_sheet_template
+        load_sheet_template(template_path, "勤務表")
+    else:
+        load_template(template_path)
+
+def build_sheet_values(df, employee_name):
+    """
+    勤務表シートに書き込むセルの値を {セル番地: 値} で返す
+    dfはprocess_dataのDataFrame、またはprocess_rowsのAttendanceRowのリスト
+    """
+    rows = df if isinstance(df, list) else list(df.itertuples())
+
+    # G6セルに従業員名を記載
+    values = {"G6": employee_name}
 
     # H5セルの月を取得し、それに基づいてA列の日付を設定
-    month_value = df["日付"].dt.month.iloc[0]
-    year_value = df["日付"].dt.year.iloc[0]
-    sheet["H5"] = month_value
-    sheet["F5"] = year_value
+    month_value = rows[0].日付.month
+    year_value = rows[0].日付.year
+    values["H5"] = month_value
+    values["F5"] = year_value
 
-    for index, row in enumerate(df.itertuples(), start=11):  # C列から開始
+    for index, row in enumerate(rows, start=11):  # C列から開始
         day_value = index - 10  # A11に1日から入力
-        sheet[f"A{index}"] = f"=DATE({year_value},{month_value},{day_value})"
-        sheet[f"C{index}"] = row.始業時刻
-        sheet[f"D{index}"] = row.終業時刻
-        sheet[f"E{index}"] = "1:00" if row.勤怠種別 not in ["未入力", "所定休日", "法定休日"] else ""  # 休憩時間
-        sheet[f"F{index}"] = row.総勤務時間  
-
-    wb.save(output_path)
-    print(f"✅ Excelファイルを保存しました: {output_path}")
+        values[f"A{index}"] = f"=DATE({year_value},{month_value},{day_value})"
+        values[f"C{index}"] = row.始業時刻
+        values[f"D{index}"] = row.終業時刻
+        values[f"E{index}"] = "1:00" if row.勤怠種別 not in ["未入力", "所定休日", "法定休日"] else ""  # 休憩時間
+        values[f"F{index}"] = row.総勤務時間
+
+    return values
+
+def fill_template(template_path, sheet_name, values):
+    """
+    openpyxlでテンプレートを読み込み、値を書き込んだWorkbookを返す
+    """
+    with timed("load_template"):
+        wb = load_template(template_path)
+    sheet = wb[sheet_name]
+    for coordinate, value in values.items():
+        sheet[coordinate] = value
+    return wb
+
+def save_with_openpyxl(template_path, output_path, sheet_name, values):
+    """
+    openpyxlでテンプレートに値を書き込んで保存する
+    """
+    fill_template(template_path, sheet_name, values).save(output_path)
+
+def write_to_excel(template_path, output_path, df, csv_filename, employee_name=None, progress=None):
+    """
+    ひな型Excelに勤怠データを書き込む
+    config.iniの[EXCEL] writerで書き込み方法を切り替える
+      openpyxl: openpyxlでテンプレートを読み込んで保存する
+      xml: テンプレートのシートXMLを直接書き換える（高速）
+      builtin: テンプレートを使わず組み込みのレイアウトで書き出す（テンプレートがない場合も同じ）
+    output_pathはファイルパスまたはバイナリのファイルオブジェクト（BytesIOなど）
+    progressを指定すると、保存を始める前に"save"を渡して呼び出す
+    """
+    # 指定がない場合はCSVファイル名から取得した従業員名
+    if employee_name is None:
+        employee_name = extract_employee_name(csv_filename) or "不明"
+    with timed("build_values"):
+        values = build_sheet_values(df, employee_name)
+
+    writer = get_excel_writer()
+    if uses_builtin_layout(template_path):
+        from layout_writer import write_builtin_sheet
+        if progress:
+            progress("save")
+        write_builtin_sheet(output_path, values)
+    elif writer == "xml":
+        from xlsx_writer import write_sheet_values
+        if progress:
+            progress("save")
+        write_sheet_values(template_path, output_path, "勤務表", values)
+    elif writer == "openpyxl":
+        wb = fill_template(template_path, "勤務表", values)
+        if progress:
+            progress("save")
+        with timed("save"):
+            wb.save(output_path)
+    else:
+        raise ValueError(f"config.iniのwriterの値が不正です: {writer}")
+
+    if isinstance(output_path, (str, os.PathLike)):
+        print(f"✅ Excelファイルを保存しました: {output_path}")
+
+# 年間の勤怠表の集計シート
+ANNUAL_SUMMARY_SHEET = "年間集計"
+
+def split_by_month(df):
+    """
+    整形したデータ（process_dataのDataFrameまたはprocess_rowsのリスト）を月ごとに分け、
+    [(年月(YYYYMM), その月のデータ), ...] を年月順に返す
+    """
+    if isinstance(df, list):
+        months = {}
+        for row in df:
+            months.setdefault(row.日付.strftime("%Y%m"), []).append(row)
+        return sorted(months.items())
+    year_month = df["日付"].dt.strftime("%Y%m")
+    return [(key, group.reset_index(drop=True)) for key, group in df.groupby(year_month, sort=True)]
+
+def month_sheet_name(year_month):
+    """月ごとのシート名（例: 2025年4月）"""
+    return f"{year_month[:4]}年{int(year_month[4:])}月"
+
+def annual_summary_rows(months):
+    """
+    年間集計シートの行（見出し・月ごとの合計・全体の合計）を返す
+    monthsは [(年月, データ), ...]
+    """
+    header = ["年月", "出勤日数", *DURATION_COLUMNS]
+    rows = [header]
+    for year_month, data in months:
+        totals = attendance_totals(data)
+        rows.append([month_sheet_name(year_month)] + [totals[column] for column in header[1:]])
+    last = len(rows)
+    # 全体の合計は数式にして、月ごとの行を修正しても合うようにする
+    rows.append(["合計"] + [f"=SUM({letter}2:{letter}{last})" for letter in "BCDEF"[:len(header) - 1]])
+    return rows
+
+def copy_sheet_settings(source, target):
+    """
+    copy_worksheetが複製しないシートの設定（条件付き書式・入力規則・表示・印刷タイトル・ヘッダー/フッター）を
+    sourceからtargetに複製する（同じWorkbook内のシート）
+    """
+    from copy import copy, deepcopy
+
+    for conditional_format in source.conditional_formatting:
+        for rule in conditional_format.rules:
+            target.conditional_formatting.add(str(conditional_format.sqref), copy(rule))
+    for validation in source.data_validations.dataValidation:
+        target.add_data_validation(copy(validation))
+    target.views = deepcopy(source.views)
+    target.sheet_view.tabSelected = False  # 複数のシートが選択された状態にしない
+    target.print_title_rows = source.print_title_rows
+    target.print_title_cols = source.print_title_cols
+    target.HeaderFooter = copy(source.HeaderFooter)
+
+def write_annual_workbook(template_path, output_path, months, csv_filename, employee_name=None):
+    """
+    複数月のデータを、月ごとの勤務表シートと年間集計シートを持つ1つのExcelファイルに書き込む
+    monthsは [(年月, データ), ...]（split_by_monthの結果）
+    テンプレートの読み込み・保存は1回だけ行い、勤務表シートを月の数だけ複製する
+    （writerがxmlの場合もシートの複製はopenpyxlで行う）
+    """
+    if employee_name is None:
+        employee_name = extract_employee_name(csv_filename) or "不明"
+    with timed("build_values"):
+        sheets = [(month_sheet_name(year_month), build_sheet_values(data, employee_name))
+                  for year_month, data in months]
+        summary = annual_summary_rows(months)
+
+    if uses_builtin_layout(template_path):
+        import openpyxl
+        from layout_writer import add_builtin_sheet
+
+        wb = openpyxl.Workbook(write_only=True)
+        with timed("save"):
+            summary_sheet = wb.create_sheet(ANNUAL_SUMMARY_SHEET)
+            for row in summary:
+                summary_sheet.append(row)
+            for sheet_name, values in sheets:
+                add_builtin_sheet(wb, values, sheet_name)
+            wb.save(output_path)
+    else:
+        with timed("load_template"):
+            wb = load_template(template_path)
+        base = wb["勤務表"]
+        # 印刷範囲はシート名付きの定義名のため、複製したシートにも設定し直す
+        print_area = base.print_area.split("!")[-1] if base.print_area else None
+        for sheet_name, values in sheets:
+            sheet = wb.copy_worksheet(base)
+            sheet.title = sheet_name
+            copy_sheet_settings(base, sheet)
+            if print_area:
+                sheet.print_area = print_area
+            for coordinate, value in values.items():
+                sheet[coordinate] = value
+        wb.remove(base)
+        summary_sheet = wb.create_sheet(ANNUAL_SUMMARY_SHEET, 0)
+        for row in summary:
+            summary_sheet.append(row)
+        wb.active = 0
+        with timed("save"):
+            wb.save(output_path)
+
+    if isinstance(output_path, (str, os.PathLike)):
+        print(f"✅ Excelファイルを保存しました: {output_path}")
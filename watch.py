@@ -0,0 +1,227 @@
+import os
+import sys
+import time
+import select
+import struct
+import fnmatch
+import argparse
+from config import (get_default_employee_name, get_input_dir, get_output_dir,
+                    get_template_path, get_excel_writer)
+from batch import CSV_PATTERN, convert_one, employee_name_for, find_csv_files, report_progress
+from utils import warm_up_imports, warm_up_template
+
+# inotifyのイベント（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """
+    一定間隔でフォルダを調べ、追加・更新されたCSVファイルを返す
+    inotifyが使えない環境（Windows・macOS・ネットワークドライブ）で使う
+    """
+
+    def __init__(self, input_dir, pattern=CSV_PATTERN, interval=1.0):
+        self.input_dir = input_dir
+        self.pattern = pattern
+        self.interval = interval
+        self.stamps = self.scan()
+
+    def scan(self):
+        stamps = {}
+        for path in find_csv_files(self.input_dir, self.pattern):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # 調べている間に削除された
+            stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def changes(self, timeout):
+        """timeout秒（最大でinterval秒）待ち、前回から追加・更新されたCSVファイルを返す"""
+        time.sleep(min(timeout, self.interval))
+        stamps = self.scan()
+        changed = {path for path, stamp in stamps.items() if self.stamps.get(path) != stamp}
+        self.stamps = stamps
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linuxのinotify（ctypesでlibcを呼び出す）でフォルダを監視し、追加・更新されたCSVファイルを返す
+    サブフォルダも監視し、新しく作られたフォルダは監視に追加する
+    """
+
+    def __init__(self, input_dir, pattern=CSV_PATTERN):
+        import ctypes
+        import ctypes.util
+
+        self.pattern = pattern
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # AttributeErrorの場合はlibcがinotifyに対応していない
+        self.libc.inotify_init1.restype = ctypes.c_int
+        self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1に失敗しました")
+        self.dirs = {}  # {監視ID: フォルダのパス}
+        for dir_path, _, _ in os.walk(input_dir):
+            self.add_watch(dir_path)
+
+    def add_watch(self, dir_path):
+        import ctypes
+
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watchに失敗しました: {dir_path}")
+        self.dirs[wd] = dir_path
+
+    def changes(self, timeout):
+        """timeout秒までイベントを待ち、追加・更新されたCSVファイルを返す"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            dir_path = self.dirs.get(wd)
+            if dir_path is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self.dirs[wd]
+                continue
+            path = os.path.join(dir_path, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # 新しいフォルダ（とその中にすでにあるCSV）も対象にする
+                    for sub_dir, _, _ in os.walk(path):
+                        self.add_watch(sub_dir)
+                    changed.update(find_csv_files(path, self.pattern))
+                continue
+            if fnmatch.fnmatch(name, self.pattern):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(input_dir, pattern=CSV_PATTERN, poll=False, interval=1.0):
+    """Linuxではinotify、それ以外（または使えない場合）は定期的な確認で監視する"""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(input_dir, pattern)
+        except (OSError, AttributeError) as e:
+            print(f"⚠ inotifyを使えないため、{interval}秒ごとの確認に切り替えます: {e}")
+    return PollingWatcher(input_dir, pattern, interval)
+
+
+def file_stamp(path):
+    """ファイルの更新日時・サイズ（存在しない場合はNone）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def watch(input_dir, template_path, default_name, pattern=CSV_PATTERN, debounce=0.5,
+          poll=False, interval=1.0):
+    """
+    入力フォルダを監視し、追加・更新されたCSVファイルを変換し続ける（Ctrl+Cで終了）
+    書き込み途中のファイルを変換しないよう、更新日時・サイズがdebounce秒変わらなくなってから変換する
+    変換は同じプロセスで行い、読み込み済みのモジュール・設定・テンプレートを使い回す
+    """
+    output_dir = get_output_dir()
+    os.makedirs(input_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 最初のCSVが届く前に重いモジュールとテンプレートを読み込んでおく
+    warm_up_imports()
+    warm_up_template(template_path)
+
+    converted = 0
+
+    def convert(path):
+        nonlocal converted
+        result = convert_one(path, template_path, employee_name_for(path, default_name), output_dir)
+        converted += 1
+        report_progress(result, converted)
+
+    # 監視を始める前に置かれていたCSVも変換する（変更がなければスキップされる）
+    watcher = create_watcher(input_dir, pattern, poll, interval)
+    for path in find_csv_files(input_dir, pattern):
+        convert(path)
+    print(f"👀 {input_dir} を監視しています（{type(watcher).__name__}、Ctrl+Cで終了）")
+
+    pending = {}  # {CSVのパス: (最後に変更を検知した時刻, その時点の更新日時・サイズ)}
+    try:
+        while True:
+            for path in watcher.changes(timeout=0.05 if pending else 1.0):
+                pending[path] = (time.monotonic(), file_stamp(path))
+
+            now = time.monotonic()
+            for path, (changed_at, stamp) in list(pending.items()):
+                if now - changed_at < debounce:
+                    continue
+                current = file_stamp(path)
+                if current is None:
+                    del pending[path]  # 変換する前に削除・移動された
+                elif current != stamp:
+                    pending[path] = (now, current)  # まだ書き込み中
+                else:
+                    del pending[path]
+                    convert(path)
+    except KeyboardInterrupt:
+        print("監視を終了しました")
+    finally:
+        watcher.close()
+
+
+def main(argv=None):
+    """python main.py watch のコマンドライン引数を処理する"""
+    parser = argparse.ArgumentParser(
+        prog="main.py watch",
+        description="入力フォルダを監視し、置かれたCSVファイルを自動で変換する"
+    )
+    parser.add_argument("--input-dir", type=str, default=get_input_dir(),
+                        help="監視するフォルダ（省略時はconfig.iniのinput_dir）")
+    parser.add_argument("--template", type=str, default=get_template_path(),
+                        help="テンプレートExcelファイルのパス（省略時はconfig.iniのtemplate_path）")
+    parser.add_argument("--name", type=str, default=get_default_employee_name(),
+                        help="CSVファイル名から従業員名が分からない場合の従業員名")
+    parser.add_argument("--pattern", type=str, default=CSV_PATTERN,
+                        help="変換するCSVファイル名のパターン")
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="ファイルの更新が止まってから変換するまでの秒数")
+    parser.add_argument("--poll", action="store_true",
+                        help="inotifyを使わず、一定間隔でフォルダを確認する")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="--poll（またはinotifyが使えない場合）の確認間隔（秒）")
+    args = parser.parse_args(argv)
+    if args.template and not os.path.exists(args.template) and get_excel_writer() != "builtin":
+        parser.error(f"テンプレートファイルが見つかりません: {args.template}"
+                     "（組み込みのレイアウトで作成する場合は --template \"\" を指定してください）")
+
+    watch(args.input_dir, args.template, args.name, pattern=args.pattern,
+          debounce=args.debounce, poll=args.poll, interval=args.interval)
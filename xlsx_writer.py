@@ -0,0 +1,274 @@
+import re
+import numbers
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+from profiling import timed
+from utils import cached_file_value
+
+# openpyxlを使わず、テンプレートのシートXMLを直接書き換えてxlsxを作る
+# シート以外のファイル（スタイル・共有文字列・コメントなど）はそのままコピーする
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_RE = re.compile(r'<row\b[^>]*?(?:/>|>.*?</row>)', re.S)
+CELL_RE = re.compile(r'<c\b[^>]*?(?:/>|>.*?</c>)', re.S)
+ROW_NUM_RE = re.compile(r'\br="(\d+)"')
+CELL_REF_RE = re.compile(r'\br="([A-Z]+)(\d+)"')
+STYLE_RE = re.compile(r'\bs="(\d+)"')
+SHARED_MASTER_RE = re.compile(r'<f\b([^>]*)\bt="shared"([^>]*)>(.*?)</f>', re.S)
+SHARED_CHILD_RE = re.compile(r'<f\b[^>]*\bt="shared"[^>]*\bsi="(\d+)"[^>]*/>')
+SHARED_INDEX_RE = re.compile(r'\bsi="(\d+)"')
+FORMULA_REF_RE = re.compile(r'(?<![A-Za-z0-9_.])(\$?)([A-Z]{1,3})(\$?)(\d+)(?![A-Za-z0-9_(])')
+
+# calcPrより後ろに置く必要がある要素
+CALC_PR_FOLLOWERS = ("<oleSize", "<customWorkbookViews", "<pivotCaches", "<smartTagPr",
+                     "<smartTagTypes", "<webPublishing", "<fileRecoveryPr",
+                     "<webPublishObjects", "<extLst", "</workbook>")
+
+# 解析済みテンプレートのキャッシュ
+# {シート名: {絶対パス: (更新日時, サイズ, SHA-1, 解析結果)}}
+_template_cache = {}
+
+
+def column_index(letters):
+    """列名（A, B, ..., AA）を1始まりの番号にする"""
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - 64
+    return index
+
+
+def column_letters(index):
+    """1始まりの列番号を列名にする"""
+    letters = ""
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def split_coordinate(coordinate):
+    """セル番地（例: G6）を (列番号, 行番号) にする"""
+    match = re.fullmatch(r'([A-Z]+)(\d+)', coordinate)
+    if not match:
+        raise ValueError(f"セル番地が不正です: {coordinate}")
+    return column_index(match.group(1)), int(match.group(2))
+
+
+def translate_formula(formula, row_offset, col_offset):
+    """共有数式を別のセル用にずらす（$付きの参照と文字列リテラルはそのまま）"""
+    def shift(match):
+        col_abs, col, row_abs, row = match.groups()
+        if not col_abs:
+            col = column_letters(column_index(col) + col_offset)
+        if not row_abs:
+            row = str(int(row) + row_offset)
+        return f"{col_abs}{col}{row_abs}{row}"
+
+    # 奇数番目は "..." の中身なので置き換えない
+    parts = formula.split('"')
+    for i in range(0, len(parts), 2):
+        parts[i] = FORMULA_REF_RE.sub(shift, parts[i])
+    return '"'.join(parts)
+
+
+def expand_shared_formulas(rows):
+    """
+    共有数式（t="shared"）を各セルの通常の数式に展開する
+    親セルを上書きしても子セルの数式が壊れないようにするため
+    """
+    masters = {}
+    for row_xml in rows.values():
+        for cell_xml in CELL_RE.findall(row_xml):
+            match = SHARED_MASTER_RE.search(cell_xml)
+            if match:
+                si = SHARED_INDEX_RE.search(match.group(1) + match.group(2)).group(1)
+                ref = CELL_REF_RE.search(cell_xml)
+                masters[si] = (column_index(ref.group(1)), int(ref.group(2)), match.group(3))
+    if not masters:
+        return rows
+
+    def expand_cell(cell_match):
+        cell_xml = cell_match.group(0)
+        master = SHARED_MASTER_RE.search(cell_xml)
+        if master:
+            return cell_xml.replace(master.group(0), f"<f>{master.group(3)}</f>")
+        child = SHARED_CHILD_RE.search(cell_xml)
+        if child and child.group(1) in masters:
+            master_col, master_row, formula = masters[child.group(1)]
+            ref = CELL_REF_RE.search(cell_xml)
+            translated = translate_formula(
+                formula, int(ref.group(2)) - master_row, column_index(ref.group(1)) - master_col
+            )
+            return cell_xml.replace(child.group(0), f"<f>{translated}</f>")
+        return cell_xml
+
+    return {num: CELL_RE.sub(expand_cell, row_xml) for num, row_xml in rows.items()}
+
+
+def find_sheet_part(entries, sheet_name):
+    """シート名からシートXMLのzip内パスを探す"""
+    workbook = ET.fromstring(entries["xl/workbook.xml"])
+    rels = ET.fromstring(entries["xl/_rels/workbook.xml.rels"])
+    for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet"):
+        if sheet.get("name") != sheet_name:
+            continue
+        rel_id = sheet.get(f"{{{REL_NS}}}id")
+        for rel in rels.iter(f"{{{PKG_REL_NS}}}Relationship"):
+            if rel.get("Id") == rel_id:
+                target = rel.get("Target")
+                if target.startswith("/"):
+                    return target.lstrip("/")
+                return posixpath.normpath(posixpath.join("xl", target))
+    raise KeyError(f"テンプレートにシート「{sheet_name}」がありません")
+
+
+def parse_template(template_path, sheet_name):
+    """
+    テンプレートのzipを読み込み、シートXMLを行ごとに分解する
+    calcChain.xmlは書き換え後のセルと合わなくなるため取り除き、
+    開いたときに再計算させる
+    """
+    with zipfile.ZipFile(template_path) as zf:
+        infos = zf.infolist()
+        entries = {info.filename: zf.read(info) for info in infos}
+
+    sheet_part = find_sheet_part(entries, sheet_name)
+    sheet_xml = entries[sheet_part].decode("utf-8")
+
+    if "<sheetData/>" in sheet_xml:
+        head, tail = sheet_xml.split("<sheetData/>", 1)
+        body = ""
+    else:
+        head, rest = sheet_xml.split("<sheetData>", 1)
+        body, tail = rest.split("</sheetData>", 1)
+    rows = {}
+    for row_xml in ROW_RE.findall(body):
+        rows[int(ROW_NUM_RE.search(row_xml).group(1))] = row_xml
+    rows = expand_shared_formulas(rows)
+
+    # calcChainを削除
+    calc_chain = [name for name in entries if name.endswith("calcChain.xml")]
+    for name in calc_chain:
+        del entries[name]
+    if calc_chain:
+        entries["[Content_Types].xml"] = re.sub(
+            rb'<Override[^>]*calcChain[^>]*/>', b"", entries["[Content_Types].xml"])
+        entries["xl/_rels/workbook.xml.rels"] = re.sub(
+            rb'<Relationship[^>]*calcChain[^>]*/>', b"", entries["xl/_rels/workbook.xml.rels"])
+
+    # 開いたときにすべての数式を再計算させる
+    workbook_xml = entries["xl/workbook.xml"].decode("utf-8")
+    if "fullCalcOnLoad" not in workbook_xml:
+        if "<calcPr" in workbook_xml:
+            workbook_xml = workbook_xml.replace("<calcPr", '<calcPr fullCalcOnLoad="1"', 1)
+        else:
+            pos = min(workbook_xml.find(tag) for tag in CALC_PR_FOLLOWERS if tag in workbook_xml)
+            workbook_xml = workbook_xml[:pos] + '<calcPr fullCalcOnLoad="1"/>' + workbook_xml[pos:]
+        entries["xl/workbook.xml"] = workbook_xml.encode("utf-8")
+
+    return {
+        "infos": [info for info in infos if info.filename in entries],
+        "entries": entries,
+        "sheet_part": sheet_part,
+        "head": head,
+        "rows": rows,
+        "tail": tail,
+    }
+
+
+def make_cell_xml(coordinate, style, value):
+    """セル1つ分のXMLを作る（openpyxlと同じ型の扱い）"""
+    attrs = f'r="{coordinate}"'
+    if style is not None:
+        attrs += f' s="{style}"'
+
+    if value is None:
+        return f"<c {attrs}/>"
+    if isinstance(value, bool):
+        return f'<c {attrs} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Number):
+        if value != value:  # NaN
+            return f"<c {attrs}/>"
+        if isinstance(value, numbers.Integral):
+            return f"<c {attrs}><v>{int(value)}</v></c>"
+        return f"<c {attrs}><v>{float(value)!r}</v></c>"
+    if isinstance(value, str):
+        if not value:
+            return f"<c {attrs}/>"
+        if value.startswith("=") and len(value) > 1:
+            return f"<c {attrs}><f>{escape(value[1:])}</f></c>"
+        space = ' xml:space="preserve"' if value != value.strip() else ""
+        return f'<c {attrs} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    raise TypeError(f"書き込めない値です: {coordinate}={value!r}")
+
+
+def patch_row(row_num, row_xml, cells):
+    """行のXMLに {列番号: (セル番地, 値)} を書き込む（既存セルの書式は引き継ぐ）"""
+    if row_xml is None:
+        row_open, existing = f'<row r="{row_num}">', []
+    elif row_xml.endswith("/>"):
+        row_open, existing = row_xml[:-2] + ">", []
+    else:
+        row_open = row_xml[:row_xml.index(">") + 1]
+        existing = CELL_RE.findall(row_xml)
+
+    by_column = {}
+    for xml in existing:
+        by_column[column_index(CELL_REF_RE.search(xml).group(1))] = xml
+    for col, (coordinate, value) in cells.items():
+        old = by_column.get(col)
+        style_match = STYLE_RE.search(old[:old.index(">")]) if old else None
+        by_column[col] = make_cell_xml(coordinate, style_match.group(1) if style_match else None, value)
+
+    return row_open + "".join(by_column[col] for col in sorted(by_column)) + "</row>"
+
+
+def load_sheet_template(template_path, sheet_name):
+    """解析済みのテンプレートを返す（内容が変わっていなければキャッシュを使う）"""
+    return cached_file_value(
+        _template_cache.setdefault(sheet_name, {}), template_path,
+        lambda path: parse_template(path, sheet_name)
+    )
+
+
+def write_sheet_values(template_path, output_path, sheet_name, values):
+    """
+    テンプレートをコピーし、指定シートのセルだけを書き換えて保存する
+    values: {セル番地: 値}、output_pathはファイルパスまたはファイルオブジェクト
+    """
+    with timed("load_template"):
+        template = load_sheet_template(template_path, sheet_name)
+
+    with timed("save"):
+        write_patched_sheet(template, output_path, values)
+
+
+def write_patched_sheet(template, output_path, values):
+    """解析済みのテンプレートのシートにvaluesを書き込み、xlsxとして保存する"""
+    # 行ごとに書き込むセルをまとめる
+    changes = {}
+    for coordinate, value in values.items():
+        col, row = split_coordinate(coordinate)
+        changes.setdefault(row, {})[col] = (coordinate, value)
+
+    rows = dict(template["rows"])
+    for row_num, cells in changes.items():
+        rows[row_num] = patch_row(row_num, rows.get(row_num), cells)
+    sheet_data = "".join(rows[num] for num in sorted(rows))
+    sheet_xml = f'{template["head"]}<sheetData>{sheet_data}</sheetData>{template["tail"]}'
+
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for info in template["infos"]:
+            # キャッシュしたZipInfoは書き込み時に書き換えられるため複製して使う
+            entry = zipfile.ZipInfo(info.filename, info.date_time)
+            entry.compress_type = info.compress_type
+            entry.external_attr = info.external_attr
+            if info.filename == template["sheet_part"]:
+                zf.writestr(entry, sheet_xml.encode("utf-8"))
+            else:
+                zf.writestr(entry, template["entries"][info.filename])